@@ -1,42 +1,3 @@
-# --- AGENTE 11: TECNOLOGIAS DE SITE FULL STACK ---
-meus_agentes["Tecnologias Full Stack"] = Agente(
-    nome="Tecnologias Full Stack",
-    system_instruction="""
-        Você é um especialista em desenvolvimento web full stack. Gere uma lista das principais tecnologias usadas para criar um site completo (front-end, back-end, banco de dados, autenticação, hospedagem, testes, etc). Para cada tecnologia, explique de forma simples o que ela faz e por que é importante no contexto de um projeto moderno.
-        Formate como uma lista com nome da tecnologia, breve explicação e exemplos de uso.
-    """
-)
-# --- AGENTE 7: EXEMPLOS PRÁTICOS ---
-meus_agentes["Exemplos Práticos"] = Agente(
-    nome="Exemplos Práticos",
-    system_instruction="""
-        Você é um especialista em exemplos práticos. Receba o conceito do site e gere 2 ou 3 exemplos reais de como usuários utilizam esse site ou tecnologia no dia a dia. Explique cada exemplo de forma clara e conecte com situações comuns do cotidiano.
-    """
-)
-
-# --- AGENTE 8: DICAS DE CARREIRA ---
-meus_agentes["Dicas de Carreira"] = Agente(
-    nome="Dicas de Carreira",
-    system_instruction="""
-        Você é um orientador de carreira em tecnologia. Receba o desafio proposto e relacione com oportunidades de carreira, áreas de atuação ou habilidades valorizadas no mercado. Dê dicas para o aluno sobre como esse conhecimento pode ser útil profissionalmente.
-    """
-)
-
-# --- AGENTE 9: TESTES AUTOMATIZADOS ---
-meus_agentes["Testes Automatizados"] = Agente(
-    nome="Testes Automatizados",
-    system_instruction="""
-        Você é um engenheiro de testes. Receba o desafio de programação e sugira 3 a 5 testes automatizados que podem ser implementados para validar as soluções dos alunos. Explique o objetivo de cada teste e como ele contribui para a qualidade do código.
-    """
-)
-
-# --- AGENTE 10: CURIOSIDADES TECNOLÓGICAS ---
-meus_agentes["Curiosidades Tecnológicas"] = Agente(
-    nome="Curiosidades Tecnológicas",
-    system_instruction="""
-        Você é um divulgador científico em tecnologia. Receba o conceito do site ou tema do desafio e compartilhe 2 curiosidades ou fatos históricos interessantes sobre o assunto, para inspirar e engajar o aluno.
-    """
-)
 # ==============================================================================
 # PROJETO: GERADOR DE ATIVIDADES DE PROGRAMAÇÃO v2.0
 # DESCRIÇÃO: Um sistema com 5 agentes de IA especialistas que colaboram
@@ -46,11 +7,20 @@ meus_agentes["Curiosidades Tecnológicas"] = Agente(
 # ==============================================================================
 # PARTE 1: ESTRUTURA E CONFIGURAÇÃO DO FRAMEWORK
 # ==============================================================================
+import time
+INICIO_IMPORTACAO = time.perf_counter()
+
+import argparse
 import os
 import google.generativeai as genai
 import textwrap
-import time
 from dotenv import load_dotenv
+from agentes import RegistroAgentes
+from artefatos import criar_armazem_padrao
+from cache_respostas import cache_padrao
+from contexto import INSTRUCAO_COMPACTADOR, NOME_COMPACTADOR, criar_orcamento_padrao
+from lote import ler_urls, processar_lote
+from orquestrador import Etapa, executar_pipeline
 
 # --- Configuração da Chave de API ---
 load_dotenv()
@@ -72,40 +42,20 @@ def formatar_texto(text: str) -> str:
 
 # ==============================================================================
 # PARTE 2: O MOLDE DO AGENTE (A CLASSE 'AGENTE')
-# (Esta é a base do framework, não precisa ser alterada)
+# (Definida em agentes.py, compartilhada com o app web. Os agentes são
+#  registrados aqui e só constroem o modelo no primeiro uso.)
 # ==============================================================================
-class Agente:
-    """Define a estrutura base para um agente de IA."""
-    def __init__(self, nome: str, system_instruction: str, model_name: str = "gemini-1.5-flash"):
-        self.nome = nome
-        self.system_instruction = textwrap.dedent(system_instruction)
-        self.model = genai.GenerativeModel(model_name=model_name, system_instruction=self.system_instruction)
-        print(f"🤖 Agente '{self.nome}' contratado e pronto para o trabalho!")
-
-    def executar(self, tarefa: str, contexto: str = None) -> str:
-        """Executa uma tarefa, opcionalmente usando um contexto."""
-        print(f"⏳ Agente '{self.nome}' iniciando tarefa...")
-        prompt = f"TAREFA: {tarefa}"
-        if contexto:
-            prompt = f"CONTEXTO PARA REALIZAR A TAREFA:\n---\n{contexto}\n---\n\n{prompt}"
-        try:
-            response = self.model.generate_content(prompt)
-            print(f"✅ Agente '{self.nome}' concluiu a tarefa!")
-            return response.text
-        except Exception as e:
-            print(f"❌ Erro ao executar o agente '{self.nome}': {e}")
-            return f"Erro: Não foi possível completar a tarefa. Motivo: {e}"
 
 # ==============================================================================
 # PARTE 3: A FÁBRICA DE AGENTES - A NOVA EQUIPE DE ESPECIALISTAS
 # ==============================================================================
 print("\n" + "="*80 + "\nINICIANDO A FÁBRICA DE AGENTES...\n" + "="*80)
 
-meus_agentes = {}
+meus_agentes = RegistroAgentes()
 
 # --- AGENTE 1: O ESTRATEGISTA ---
-meus_agentes["Analisador de Negócios"] = Agente(
-    nome="Analisador de Negócios",
+meus_agentes.registrar(
+    "Analisador de Negócios",
     system_instruction="""
         Você é um analista de negócios sênior e didático. Ao receber uma URL, explique de forma clara e acessível:
         1. Qual é o modelo de negócio do site? (Explique com exemplos práticos)
@@ -116,8 +66,8 @@ meus_agentes["Analisador de Negócios"] = Agente(
 )
 
 # --- AGENTE 2: O ENGENHEIRO DE FRONT-END ---
-meus_agentes["Engenheiro de UI/UX"] = Agente(
-    nome="Engenheiro de UI/UX",
+meus_agentes.registrar(
+    "Engenheiro de UI/UX",
     system_instruction="""
         Você é um engenheiro de Front-end e especialista em UI/UX, com foco em clareza e didática. Com base no conceito de negócio (contexto),
         liste de 5 a 7 componentes de interface e funcionalidades essenciais, explicando brevemente para que serve cada um e como o usuário interage.
@@ -126,8 +76,8 @@ meus_agentes["Engenheiro de UI/UX"] = Agente(
 )
 
 # --- AGENTE 3: O ARQUITETO DE BACK-END ---
-meus_agentes["Arquiteto de Back-End"] = Agente(
-    nome="Arquiteto de Back-End",
+meus_agentes.registrar(
+    "Arquiteto de Back-End",
     system_instruction="""
         Você é um arquiteto de software especializado em Back-end, com perfil explicativo. Com base nas funcionalidades de front-end (contexto),
         projete os recursos de back-end necessários, detalhando:
@@ -138,8 +88,8 @@ meus_agentes["Arquiteto de Back-End"] = Agente(
 )
 
 # --- AGENTE 4: O CRIADOR DO DESAFIO ---
-meus_agentes["Desenvolvedor de Conteúdo Didático"] = Agente(
-    nome="Desenvolvedor de Conteúdo Didático",
+meus_agentes.registrar(
+    "Desenvolvedor de Conteúdo Didático",
     system_instruction="""
         Você é um educador de programação, focado em tornar o aprendizado envolvente e acessível. Receba as especificações de front-end e back-end (contexto)
         e transforme em um desafio de programação claro, motivador e estruturado.
@@ -149,8 +99,8 @@ meus_agentes["Desenvolvedor de Conteúdo Didático"] = Agente(
 )
 
 # --- AGENTE 5: O REVISOR FINAL ---
-meus_agentes["Revisor Pedagógico"] = Agente(
-    nome="Revisor Pedagógico",
+meus_agentes.registrar(
+    "Revisor Pedagógico",
     system_instruction="""
         Você é um professor experiente, com didática impecável e foco em motivação. Receba o rascunho de uma atividade de programação (contexto)
         e aprimore-o para que fique claro, envolvente e fácil de seguir.
@@ -162,19 +112,20 @@ meus_agentes["Revisor Pedagógico"] = Agente(
 )
 
 # --- AGENTE 6: O EXPLORADOR WEB ALEATÓRIO ---
-meus_agentes["Explorador Web Aleatório"] = Agente(
-    nome="Explorador Web Aleatório",
+meus_agentes.registrar(
+    "Explorador Web Aleatório",
     system_instruction="""
         Você é um explorador web curioso e didático. Sua função é escolher uma URL de um site popular, educativo ou interessante de forma aleatória.
         Escolha sites que possam gerar atividades úteis e inspiradoras. Retorne a URL escolhida e explique em uma frase por que esse site pode ser interessante para aprender programação ou tecnologia. Evite sites impróprios ou de conteúdo sensível.
-    """
+    """,
+    # A escolha precisa ser aleatória a cada chamada: sem cache e sem compartilhar chamadas simultâneas.
+    cache=None,
+    coalescer=False,
 )
 
-print("\n" + "="*80 + f"\nFÁBRICA CONCLUÍDA: {len(meus_agentes)} agentes contratados.\n" + "="*80)
-
 # --- AGENTE 11: TECNOLOGIAS DE SITE FULL STACK ---
-meus_agentes["Tecnologias Full Stack"] = Agente(
-    nome="Tecnologias Full Stack",
+meus_agentes.registrar(
+    "Tecnologias Full Stack",
     system_instruction="""
         Você é um especialista em desenvolvimento web full stack. Gere uma lista das principais tecnologias usadas para criar um site completo (front-end, back-end, banco de dados, autenticação, hospedagem, testes, etc). Para cada tecnologia, explique de forma simples o que ela faz e por que é importante no contexto de um projeto moderno.
         Formate como uma lista com nome da tecnologia, breve explicação e exemplos de uso.
@@ -182,51 +133,110 @@ meus_agentes["Tecnologias Full Stack"] = Agente(
 )
 
 # --- AGENTE 7: EXEMPLOS PRÁTICOS ---
-meus_agentes["Exemplos Práticos"] = Agente(
-    nome="Exemplos Práticos",
+meus_agentes.registrar(
+    "Exemplos Práticos",
     system_instruction="""
         Você é um especialista em exemplos práticos. Receba o conceito do site e gere 2 ou 3 exemplos reais de como usuários utilizam esse site ou tecnologia no dia a dia. Explique cada exemplo de forma clara e conecte com situações comuns do cotidiano.
     """
 )
 
 # --- AGENTE 8: DICAS DE CARREIRA ---
-meus_agentes["Dicas de Carreira"] = Agente(
-    nome="Dicas de Carreira",
+meus_agentes.registrar(
+    "Dicas de Carreira",
     system_instruction="""
         Você é um orientador de carreira em tecnologia. Receba o desafio proposto e relacione com oportunidades de carreira, áreas de atuação ou habilidades valorizadas no mercado. Dê dicas para o aluno sobre como esse conhecimento pode ser útil profissionalmente.
     """
 )
 
 # --- AGENTE 9: TESTES AUTOMATIZADOS ---
-meus_agentes["Testes Automatizados"] = Agente(
-    nome="Testes Automatizados",
+meus_agentes.registrar(
+    "Testes Automatizados",
     system_instruction="""
         Você é um engenheiro de testes. Receba o desafio de programação e sugira 3 a 5 testes automatizados que podem ser implementados para validar as soluções dos alunos. Explique o objetivo de cada teste e como ele contribui para a qualidade do código.
     """
 )
 
 # --- AGENTE 10: CURIOSIDADES TECNOLÓGICAS ---
-meus_agentes["Curiosidades Tecnológicas"] = Agente(
-    nome="Curiosidades Tecnológicas",
+meus_agentes.registrar(
+    "Curiosidades Tecnológicas",
     system_instruction="""
         Você é um divulgador científico em tecnologia. Receba o conceito do site ou tema do desafio e compartilhe 2 curiosidades ou fatos históricos interessantes sobre o assunto, para inspirar e engajar o aluno.
     """
 )
 
+# --- AGENTE DE APOIO: O COMPACTADOR DE CONTEXTO ---
+meus_agentes.registrar(NOME_COMPACTADOR, system_instruction=INSTRUCAO_COMPACTADOR)
+
+print("\n" + "="*80 + f"\nFÁBRICA CONCLUÍDA: {len(meus_agentes)} agentes registrados (construídos no primeiro uso).\n" + "="*80)
+TEMPO_INICIALIZACAO = time.perf_counter() - INICIO_IMPORTACAO
+print(f"⚡ Pronto em {TEMPO_INICIALIZACAO * 1000:.0f} ms.")
+
 # ==============================================================================
 # PARTE 4: A ORQUESTRA - A NOVA LINHA DE MONTAGEM
 # ==============================================================================
 
-def main():
+# --- O grafo de etapas: cada etapa declara de quais resultados depende ---
+# Etapas sem dependência entre si (ex: Front-End e as seções extras que só
+# precisam do conceito) rodam em paralelo.
+ETAPAS_PIPELINE = [
+    Etapa("conceito", "Analisador de Negócios", lambda r: f"Analise a URL: {r['url']}"),
+    Etapa("frontend", "Engenheiro de UI/UX", "Liste os componentes de UI/UX.", ("conceito",)),
+    Etapa("backend", "Arquiteto de Back-End", "Projete a API e os modelos de dados.", ("frontend",)),
+    Etapa(
+        "rascunho", "Desenvolvedor de Conteúdo Didático", "Crie o desafio de programação.", ("frontend", "backend"),
+        contexto=lambda r: f"Especificações de Front-End:\n{r['frontend']}\n\nEspecificações de Back-End:\n{r['backend']}",
+    ),
+    Etapa("final", "Revisor Pedagógico", "Revise e formate esta atividade.", ("rascunho",), compactavel=False),
+]
+
+# --- Seções extras opcionais, pedidas com --extras exemplos,carreira ---
+ETAPAS_EXTRAS = {
+    "exemplos": Etapa("exemplos", "Exemplos Práticos", "Gere exemplos práticos de uso.", ("conceito",)),
+    "curiosidades": Etapa("curiosidades", "Curiosidades Tecnológicas", "Compartilhe curiosidades sobre o tema.", ("conceito",)),
+    "tecnologias": Etapa("tecnologias", "Tecnologias Full Stack", "Liste as tecnologias para construir este site.", ("conceito",)),
+    "carreira": Etapa("carreira", "Dicas de Carreira", "Relacione o desafio com oportunidades de carreira.", ("rascunho",)),
+    "testes": Etapa("testes", "Testes Automatizados", "Sugira testes automatizados para o desafio.", ("rascunho",)),
+}
+
+def montar_etapas(extras=()):
+    """As cinco etapas principais mais as seções extras pedidas."""
+    return ETAPAS_PIPELINE + [ETAPAS_EXTRAS[nome] for nome in sorted(set(extras))]
+
+# --- Orçamento de tokens do contexto passado entre as etapas ---
+ORCAMENTO_CONTEXTO = criar_orcamento_padrao()
+
+# --- Artefatos das etapas: só recalcula o que mudou desde a última execução ---
+ARMAZEM_ARTEFATOS = criar_armazem_padrao()
+
+TITULOS_ETAPAS = {
+    "conceito": "\n---  концепт ETAPA 1: CONCEITO DE NEGÓCIO ---",
+    "frontend": "\n--- 🎨 ETAPA 2: ESPECIFICAÇÕES DE FRONT-END ---",
+    "backend": "\n--- ⚙️ ETAPA 3: ESPECIFICAÇÕES DE BACK-END ---",
+    "rascunho": "\n--- 📝 ETAPA 4: RASCUNHO DA ATIVIDADE ---",
+    "exemplos": "\n--- 💡 EXTRA: EXEMPLOS PRÁTICOS ---",
+    "curiosidades": "\n--- 🔎 EXTRA: CURIOSIDADES TECNOLÓGICAS ---",
+    "tecnologias": "\n--- 🧰 EXTRA: TECNOLOGIAS FULL STACK ---",
+    "carreira": "\n--- 🚀 EXTRA: DICAS DE CARREIRA ---",
+    "testes": "\n--- 🧪 EXTRA: TESTES AUTOMATIZADOS ---",
+}
+
+def exibir_etapa(nome: str, resultado: str):
+    """Mostra o resultado de cada etapa assim que ela termina."""
+    if nome == "final":
+        print("\n" + "="*80)
+        print("✨🎉 ATIVIDADE FINAL REVISADA (Pronta para os Alunos!) 🎉✨")
+        print("="*80)
+    else:
+        print(TITULOS_ETAPAS.get(nome, f"\n--- {nome.upper()} ---"))
+    print(formatar_texto(resultado))
+
+def main(extras=()):
     """Função principal que executa o fluxo de trabalho dos agentes."""
 
     print("\n--- INICIANDO ORQUESTRADOR DE AGENTES v2.1 ---")
     escolha = input("❓ Deseja informar uma URL ou deixar o agente escolher um site aleatório? (digite 'manual' ou 'aleatorio')\n> ").strip().lower()
     print("-" * 80)
 
-    # Pausa entre agentes para não sobrecarregar a API e facilitar a leitura.
-    PAUSA_ENTRE_AGENTES = 10
-
     try:
         if escolha == "aleatorio":
             tarefa_inicial = meus_agentes["Explorador Web Aleatório"].executar(tarefa="Escolha uma URL aleatória.")
@@ -234,43 +244,55 @@ def main():
         else:
             tarefa_inicial = input("❓ Qual a URL do site que vamos usar como base para a atividade? (ex: https://www.airbnb.com)\n> ")
 
-        # ETAPA 1: O Analisador de Negócios define o conceito.
-        contexto_conceito = meus_agentes["Analisador de Negócios"].executar(tarefa=f"Analise a URL: {tarefa_inicial}")
-        print("\n---  концепт ETAPA 1: CONCEITO DE NEGÓCIO ---")
-        print(formatar_texto(contexto_conceito))
-        time.sleep(PAUSA_ENTRE_AGENTES)
-
-        # ETAPA 2: O Engenheiro de UI/UX lista as funcionalidades.
-        contexto_frontend = meus_agentes["Engenheiro de UI/UX"].executar(tarefa="Liste os componentes de UI/UX.", contexto=contexto_conceito)
-        print("\n--- 🎨 ETAPA 2: ESPECIFICAÇÕES DE FRONT-END ---")
-        print(formatar_texto(contexto_frontend))
-        time.sleep(PAUSA_ENTRE_AGENTES)
-
-        # ETAPA 3: O Arquiteto de Back-End projeta a API e o DB.
-        contexto_backend = meus_agentes["Arquiteto de Back-End"].executar(tarefa="Projete a API e os modelos de dados.", contexto=contexto_frontend)
-        print("\n--- ⚙️ ETAPA 3: ESPECIFICAÇÕES DE BACK-END ---")
-        print(formatar_texto(contexto_backend))
-        time.sleep(PAUSA_ENTRE_AGENTES)
-
-        # ETAPA 4: O Desenvolvedor Didático monta o rascunho da atividade.
-        contexto_para_desafio = f"Especificações de Front-End:\n{contexto_frontend}\n\nEspecificações de Back-End:\n{contexto_backend}"
-        contexto_rascunho = meus_agentes["Desenvolvedor de Conteúdo Didático"].executar(tarefa="Crie o desafio de programação.", contexto=contexto_para_desafio)
-        print("\n--- 📝 ETAPA 4: RASCUNHO DA ATIVIDADE ---")
-        print(formatar_texto(contexto_rascunho))
-        time.sleep(PAUSA_ENTRE_AGENTES)
-
-        # ETAPA 5: O Revisor Pedagógico dá o toque final.
-        atividade_final = meus_agentes["Revisor Pedagógico"].executar(tarefa="Revise e formate esta atividade.", contexto=contexto_rascunho)
+        execucao = executar_pipeline(
+            montar_etapas(extras), meus_agentes, entradas={"url": tarefa_inicial},
+            orcamento=ORCAMENTO_CONTEXTO, armazem=ARMAZEM_ARTEFATOS, ao_concluir=exibir_etapa,
+        )
         print("\n" + "="*80)
-        print("✨🎉 ATIVIDADE FINAL REVISADA (Pronta para os Alunos!) 🎉✨")
-        print("="*80)
-        print(formatar_texto(atividade_final))
+        print(execucao.relatorio())
+        estatisticas = cache_padrao.estatisticas()
+        print(f"♻️ Cache: {estatisticas['taxa_acerto']:.0%} de acerto ({estatisticas['falhas']} falhas).")
+        print(f"🤖 {len(meus_agentes.construidos())} de {len(meus_agentes)} agentes construídos "
+              f"({meus_agentes.segundos_construindo * 1000:.0f} ms).")
 
     except Exception as e:
         print(f"\n❌ Ocorreu um erro inesperado durante a orquestração: {e}")
 
+def gerar_atividade(url: str, extras=()) -> dict:
+    """Roda a linha de montagem completa para uma URL, sem interação (usada no modo lote)."""
+    execucao = executar_pipeline(
+        montar_etapas(extras), meus_agentes, entradas={"url": url}, orcamento=ORCAMENTO_CONTEXTO, armazem=ARMAZEM_ARTEFATOS,
+    )
+    return {
+        "resultado": execucao.resultados["final"],
+        "etapas": {nome: execucao.resultados[nome] for nome in execucao.tempos},
+        "tempos": execucao.tempos,
+        "caminho_critico": execucao.caminho_critico,
+    }
+
+def main_lote(argumentos):
+    """Modo lote: gera atividades para todas as URLs do arquivo de entrada."""
+    print(f"\n--- MODO LOTE: {argumentos.lote} → {argumentos.saida} ---")
+    processar_lote(
+        ler_urls(argumentos.lote), lambda url: gerar_atividade(url, argumentos.extras), argumentos.saida,
+        max_paralelo=argumentos.concorrencia,
+    )
+
 # ==============================================================================
 # PARTE 5: PONTO DE PARTIDA DO PROGRAMA
 # ==============================================================================
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Gerador de atividades de programação com agentes de IA.")
+    parser.add_argument("--lote", help="Arquivo com URLs (JSONL com {\"url\": ...} ou uma URL por linha).")
+    parser.add_argument("--saida", default="atividades.jsonl", help="Arquivo JSONL de saída do lote (retomável).")
+    parser.add_argument("--concorrencia", type=int, default=2, help="Quantas atividades gerar ao mesmo tempo no lote.")
+    parser.add_argument("--extras", default="", help=f"Seções extras separadas por vírgula ({', '.join(ETAPAS_EXTRAS)}).")
+    argumentos = parser.parse_args()
+    argumentos.extras = [nome.strip() for nome in argumentos.extras.split(",") if nome.strip()]
+    desconhecidos = [nome for nome in argumentos.extras if nome not in ETAPAS_EXTRAS]
+    if desconhecidos:
+        parser.error(f"seções extras desconhecidas: {', '.join(desconhecidos)}")
+    if argumentos.lote:
+        main_lote(argumentos)
+    else:
+        main(argumentos.extras)
\ No newline at end of file
@@ -0,0 +1,169 @@
+# ==============================================================================
+# ACERVO DE ATIVIDADES GERADAS
+# DESCRIÇÃO: Cada atividade concluída é guardada num SQLite local com a URL,
+#            o modo, a saída de cada etapa, os modelos usados e os tempos.
+#            Um índice FTS5 permite buscar no texto das atividades, e um
+#            pedido repetido para a mesma URL vira uma única leitura indexada
+#            em vez de uma nova linha de montagem. Cada atividade guarda a
+#            impressão digital das etapas que a geraram: mudar a instrução ou
+#            o modelo de um agente invalida as atividades antigas.
+# ==============================================================================
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+class AcervoAtividades:
+    """Histórico persistente das atividades geradas, com busca por texto."""
+
+    def __init__(self, caminho_db: str):
+        self.caminho_db = caminho_db
+        self._lock = threading.Lock()
+        self.metricas = {"acertos": 0, "falhas": 0, "gravacoes": 0}
+        with self._conectar() as conexao:
+            conexao.execute(
+                """CREATE TABLE IF NOT EXISTS atividades (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    modo TEXT NOT NULL,
+                    extras TEXT NOT NULL,
+                    resultado TEXT NOT NULL,
+                    etapas TEXT NOT NULL,
+                    modelos TEXT NOT NULL,
+                    tempos TEXT NOT NULL,
+                    caminho_critico TEXT NOT NULL,
+                    duracao_total REAL NOT NULL,
+                    criado_em REAL NOT NULL,
+                    impressoes TEXT NOT NULL DEFAULT '{}'
+                )"""
+            )
+            colunas = {linha[1] for linha in conexao.execute("PRAGMA table_info(atividades)")}
+            if "impressoes" not in colunas:
+                conexao.execute("ALTER TABLE atividades ADD COLUMN impressoes TEXT NOT NULL DEFAULT '{}'")
+            conexao.execute("CREATE INDEX IF NOT EXISTS atividades_url ON atividades (url, criado_em)")
+            # Busca sem acentos ("pagina" encontra "página").
+            conexao.execute(
+                """CREATE VIRTUAL TABLE IF NOT EXISTS atividades_fts USING fts5(
+                    url, resultado, etapas, tokenize = 'unicode61 remove_diacritics 2'
+                )"""
+            )
+
+    def _conectar(self) -> sqlite3.Connection:
+        conexao = sqlite3.connect(self.caminho_db, timeout=30)
+        conexao.row_factory = sqlite3.Row
+        return conexao
+
+    def registrar(self, url: str, modo: str, execucao, modelos: Dict[str, str], extras: Iterable[str] = (),
+                  impressoes: Optional[Dict[str, str]] = None) -> int:
+        """
+        Guarda uma execução concluída da linha de montagem. `impressoes` são as impressões
+        digitais das etapas (ver artefatos.impressoes_etapas). Retorna o id da atividade.
+        """
+        etapas = {nome: texto for nome, texto in execucao.resultados.items() if nome != "url"}
+        valores = (
+            url, modo, json.dumps(sorted(extras)), etapas["final"], json.dumps(etapas, ensure_ascii=False),
+            json.dumps(modelos), json.dumps(execucao.tempos), json.dumps(execucao.caminho_critico),
+            execucao.duracao_total, time.time(), json.dumps(impressoes or {}),
+        )
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                """INSERT INTO atividades (url, modo, extras, resultado, etapas, modelos, tempos,
+                       caminho_critico, duracao_total, criado_em, impressoes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                valores,
+            )
+            atividade_id = cursor.lastrowid
+            conexao.execute(
+                "INSERT INTO atividades_fts (rowid, url, resultado, etapas) VALUES (?, ?, ?, ?)",
+                (atividade_id, url, etapas["final"], "\n\n".join(etapas.values())),
+            )
+        with self._lock:
+            self.metricas["gravacoes"] += 1
+        return atividade_id
+
+    def mais_recente(self, url: str, extras: Iterable[str] = (), impressoes: Optional[Dict[str, str]] = None) -> Optional[dict]:
+        """
+        A atividade mais recente para a URL que inclua todas as seções `extras`, ou None.
+        Com `impressoes`, só vale uma atividade gerada por etapas com as mesmas impressões.
+        """
+        extras = set(extras)
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                "SELECT * FROM atividades WHERE url = ? ORDER BY criado_em DESC", (url,)
+            ).fetchall()
+        atividade = next((self._completa(l) for l in linhas if extras <= set(json.loads(l["extras"]))
+                          and self._mesmas_impressoes(l, impressoes)), None)
+        with self._lock:
+            self.metricas["acertos" if atividade else "falhas"] += 1
+        return atividade
+
+    @staticmethod
+    def _mesmas_impressoes(linha: sqlite3.Row, impressoes: Optional[Dict[str, str]]) -> bool:
+        if impressoes is None:
+            return True
+        guardadas = json.loads(linha["impressoes"])
+        return all(guardadas.get(nome) == impressao for nome, impressao in impressoes.items())
+
+    def obter(self, atividade_id: int) -> Optional[dict]:
+        with self._conectar() as conexao:
+            linha = conexao.execute("SELECT * FROM atividades WHERE id = ?", (atividade_id,)).fetchone()
+        return self._completa(linha) if linha else None
+
+    def listar(self, limite: int = 20, deslocamento: int = 0, url: Optional[str] = None) -> List[dict]:
+        """Resumo das atividades, da mais recente para a mais antiga (opcionalmente de uma URL)."""
+        filtro, parametros = ("WHERE url = ?", (url,)) if url else ("", ())
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                f"SELECT * FROM atividades {filtro} ORDER BY criado_em DESC LIMIT ? OFFSET ?",
+                (*parametros, limite, deslocamento),
+            ).fetchall()
+        return [self._resumo(linha) for linha in linhas]
+
+    def buscar(self, texto: str, limite: int = 20) -> List[dict]:
+        """Busca por palavras no texto das atividades, das mais relevantes para as menos."""
+        # Cada palavra vira um termo entre aspas: a entrada do usuário não é interpretada como sintaxe FTS.
+        consulta = " ".join('"' + termo.replace('"', '""') + '"' for termo in texto.split())
+        if not consulta:
+            return []
+        with self._conectar() as conexao:
+            linhas = conexao.execute(
+                """SELECT a.*, snippet(atividades_fts, 2, '[', ']', '…', 12) AS trecho
+                   FROM atividades_fts JOIN atividades a ON a.id = atividades_fts.rowid
+                   WHERE atividades_fts MATCH ? ORDER BY rank LIMIT ?""",
+                (consulta, limite),
+            ).fetchall()
+        return [{**self._resumo(linha), "trecho": linha["trecho"]} for linha in linhas]
+
+    def _resumo(self, linha: sqlite3.Row) -> dict:
+        return {
+            "id": linha["id"],
+            "url": linha["url"],
+            "modo": linha["modo"],
+            "extras": json.loads(linha["extras"]),
+            "duracao_total": linha["duracao_total"],
+            "criado_em": linha["criado_em"],
+        }
+
+    def _completa(self, linha: sqlite3.Row) -> dict:
+        return {
+            **self._resumo(linha),
+            "resultado": linha["resultado"],
+            "etapas": json.loads(linha["etapas"]),
+            "modelos": json.loads(linha["modelos"]),
+            "tempos": json.loads(linha["tempos"]),
+            "caminho_critico": json.loads(linha["caminho_critico"]),
+        }
+
+    def estatisticas(self) -> dict:
+        with self._conectar() as conexao:
+            total = conexao.execute("SELECT COUNT(*) FROM atividades").fetchone()[0]
+        with self._lock:
+            return {"atividades": total, **self.metricas}
+
+
+def criar_acervo_padrao() -> Optional[AcervoAtividades]:
+    """Cria o acervo a partir do ambiente. ACERVO_DB vazio desliga o histórico."""
+    caminho = os.getenv("ACERVO_DB", "atividades.sqlite3")
+    return AcervoAtividades(caminho) if caminho else None
@@ -0,0 +1,273 @@
+# ==============================================================================
+# O MOLDE DO AGENTE E O REGISTRO DE AGENTES
+# DESCRIÇÃO: A classe 'Agente' compartilhada pelo app web e pela CLI, e um
+#            registro que guarda apenas as especificações de cada agente.
+#            O agente (e o modelo do Gemini por trás dele) só é construído
+#            no primeiro uso, e então fica em cache no processo. Cada agente
+#            tem uma API síncrona (CLI, workers da fila) e uma assíncrona
+#            (servidor ASGI).
+# ==============================================================================
+import asyncio
+import textwrap
+import threading
+import time
+from typing import Dict, Iterator
+
+from cache_respostas import CacheRespostas, cache_padrao, gerar_chave
+from chamada_unica import chamadas_modelo, chamadas_modelo_async
+from limitador import LimitadorTaxa, estimar_tokens, limitador_padrao
+from metricas import (
+    agentes_em_andamento, chamadas_agente, erros_agente, latencia_agente, tokens_prompt, tokens_resposta,
+)
+from modelos import FabricaModelo, criar_fabrica_padrao
+
+# --- Backend de modelo usado por padrão (Gemini, ou o falso com BACKEND_MODELO=falso) ---
+fabrica_modelo_padrao = criar_fabrica_padrao()
+
+
+class Agente:
+    """Define a estrutura base para um agente de IA."""
+    def __init__(self, nome: str, system_instruction: str, model_name: str = "gemini-1.5-flash", cache: CacheRespostas = cache_padrao, limitador: LimitadorTaxa = limitador_padrao, fabrica_modelo: FabricaModelo = None, coalescer: bool = True):
+        """
+        Com `coalescer=False`, chamadas simultâneas com o mesmo prompt não compartilham
+        a resposta (ex: o explorador aleatório, que deve escolher algo novo a cada chamada).
+        """
+        self.nome = nome
+        self.model_name = model_name
+        self.cache = cache
+        self.limitador = limitador
+        self.fabrica_modelo = fabrica_modelo or fabrica_modelo_padrao
+        self.coalescer = coalescer
+        self.system_instruction = textwrap.dedent(system_instruction)
+        self._model = None
+        self._lock_model = threading.Lock()
+
+    @property
+    def model(self):
+        """O modelo (Gemini ou outro backend), criado apenas quando o agente é usado pela primeira vez."""
+        if self._model is None:
+            with self._lock_model:
+                if self._model is None:
+                    self._model = self.fabrica_modelo(self.model_name, self.system_instruction)
+                    print(f"🤖 Agente '{self.nome}' contratado e pronto para o trabalho!")
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    def montar_prompt(self, tarefa: str, contexto: str = None) -> str:
+        prompt = f"TAREFA: {tarefa}"
+        if contexto:
+            prompt = f"CONTEXTO PARA REALIZAR A TAREFA:\n---\n{contexto}\n---\n\n{prompt}"
+        return prompt
+
+    def executar(self, tarefa: str, contexto: str = None, reaproveitar: bool = True) -> str:
+        """
+        Executa uma tarefa, opcionalmente usando um contexto. Com `reaproveitar=False`
+        o cache não é consultado (a resposta nova ainda é guardada nele).
+        """
+        print(f"⏳ Agente '{self.nome}' iniciando tarefa...")
+        inicio = time.perf_counter()
+        agentes_em_andamento.inc(agente=self.nome)
+        try:
+            resposta, origem = self._executar(tarefa, contexto, reaproveitar)
+            chamadas_agente.inc(agente=self.nome, origem=origem)
+            return resposta
+        except Exception as e:
+            erros_agente.inc(agente=self.nome, erro=type(e).__name__)
+            raise
+        finally:
+            agentes_em_andamento.dec(agente=self.nome)
+            latencia_agente.observar(time.perf_counter() - inicio, agente=self.nome)
+
+    def _executar(self, tarefa: str, contexto: str = None, reaproveitar: bool = True):
+        """Devolve (resposta, origem), onde origem é 'cache', 'compartilhada' ou 'modelo'."""
+        prompt = self.montar_prompt(tarefa, contexto)
+        chave = gerar_chave(self.model_name, self.system_instruction, prompt)
+        if self.cache is not None and reaproveitar:
+            resposta_em_cache = self.cache.obter(chave)
+            if resposta_em_cache is not None:
+                print(f"♻️ Agente '{self.nome}' reutilizou uma resposta do cache.")
+                return resposta_em_cache, "cache"
+        try:
+            if self.coalescer:
+                # Prompts idênticos em andamento ao mesmo tempo compartilham uma única chamada ao modelo.
+                resposta, compartilhada = chamadas_modelo.executar(chave, lambda: self._gerar(prompt, chave))
+            else:
+                resposta, compartilhada = self._gerar(prompt, chave), False
+            if compartilhada:
+                print(f"🔗 Agente '{self.nome}' aproveitou uma chamada idêntica em andamento.")
+                return resposta, "compartilhada"
+            print(f"✅ Agente '{self.nome}' concluiu a tarefa!")
+            return resposta, "modelo"
+        except Exception as e:
+            # Falha rápida: o erro interrompe a linha de montagem em vez de virar contexto do próximo agente.
+            print(f"❌ Erro ao executar o agente '{self.nome}': {e}")
+            raise
+
+    def _gerar(self, prompt: str, chave: str) -> str:
+        estimativa = estimar_tokens(self.system_instruction + prompt)
+        response = self.limitador.executar(
+            lambda: self.model.generate_content(prompt), estimativa, descricao=f"Agente '{self.nome}'"
+        )
+        return self._registrar_resposta(getattr(response, "usage_metadata", None), response.text, estimativa, chave)
+
+    def _registrar_resposta(self, uso, texto: str, estimativa: int, chave: str) -> str:
+        """Corrige o limitador com o uso real, conta os tokens e guarda a resposta no cache."""
+        self.limitador.registrar_uso(estimativa, getattr(uso, "total_token_count", None))
+        tokens_prompt.inc(getattr(uso, "prompt_token_count", None) or estimativa, agente=self.nome)
+        tokens_resposta.inc(getattr(uso, "candidates_token_count", None) or estimar_tokens(texto), agente=self.nome)
+        if self.cache is not None:
+            self.cache.guardar(chave, texto)
+        return texto
+
+    async def executar_async(self, tarefa: str, contexto: str = None, reaproveitar: bool = True) -> str:
+        """Versão assíncrona de executar: espera o modelo sem ocupar uma thread."""
+        print(f"⏳ Agente '{self.nome}' iniciando tarefa (async)...")
+        inicio = time.perf_counter()
+        agentes_em_andamento.inc(agente=self.nome)
+        try:
+            resposta, origem = await self._executar_async(tarefa, contexto, reaproveitar)
+            chamadas_agente.inc(agente=self.nome, origem=origem)
+            return resposta
+        except (Exception, asyncio.CancelledError) as e:
+            erros_agente.inc(agente=self.nome, erro=type(e).__name__)
+            raise
+        finally:
+            agentes_em_andamento.dec(agente=self.nome)
+            latencia_agente.observar(time.perf_counter() - inicio, agente=self.nome)
+
+    async def _executar_async(self, tarefa: str, contexto: str = None, reaproveitar: bool = True):
+        prompt = self.montar_prompt(tarefa, contexto)
+        chave = gerar_chave(self.model_name, self.system_instruction, prompt)
+        if self.cache is not None and reaproveitar:
+            # O cache lê do SQLite: numa thread, para um banco travado não parar o loop inteiro.
+            resposta_em_cache = await asyncio.to_thread(self.cache.obter, chave)
+            if resposta_em_cache is not None:
+                print(f"♻️ Agente '{self.nome}' reutilizou uma resposta do cache.")
+                return resposta_em_cache, "cache"
+        try:
+            if self.coalescer:
+                resposta, compartilhada = await chamadas_modelo_async.executar(chave, lambda: self._gerar_async(prompt, chave))
+            else:
+                resposta, compartilhada = await self._gerar_async(prompt, chave), False
+            if compartilhada:
+                print(f"🔗 Agente '{self.nome}' aproveitou uma chamada idêntica em andamento.")
+                return resposta, "compartilhada"
+            print(f"✅ Agente '{self.nome}' concluiu a tarefa!")
+            return resposta, "modelo"
+        except asyncio.CancelledError:
+            print(f"🛑 Agente '{self.nome}' cancelado.")
+            raise
+        except Exception as e:
+            print(f"❌ Erro ao executar o agente '{self.nome}': {e}")
+            raise
+
+    async def _gerar_async(self, prompt: str, chave: str) -> str:
+        estimativa = estimar_tokens(self.system_instruction + prompt)
+        response = await self.limitador.executar_async(
+            lambda: self.model.generate_content_async(prompt), estimativa, descricao=f"Agente '{self.nome}'"
+        )
+        return await asyncio.to_thread(
+            self._registrar_resposta, getattr(response, "usage_metadata", None), response.text, estimativa, chave
+        )
+
+    def executar_stream(self, tarefa: str, contexto: str = None, reaproveitar: bool = True):
+        """Igual a executar, mas devolve a resposta em pedaços à medida que o modelo gera."""
+        print(f"⏳ Agente '{self.nome}' iniciando tarefa (streaming)...")
+        inicio = time.perf_counter()
+        agentes_em_andamento.inc(agente=self.nome)
+        try:
+            origem = yield from self._executar_stream(tarefa, contexto, reaproveitar)
+            chamadas_agente.inc(agente=self.nome, origem=origem)
+        except Exception as e:
+            erros_agente.inc(agente=self.nome, erro=type(e).__name__)
+            print(f"❌ Erro ao executar o agente '{self.nome}': {e}")
+            raise
+        finally:
+            agentes_em_andamento.dec(agente=self.nome)
+            latencia_agente.observar(time.perf_counter() - inicio, agente=self.nome)
+
+    def _executar_stream(self, tarefa: str, contexto: str = None, reaproveitar: bool = True):
+        """Gera os pedaços da resposta e devolve (no StopIteration) a origem: 'cache' ou 'modelo'."""
+        prompt = self.montar_prompt(tarefa, contexto)
+        chave = gerar_chave(self.model_name, self.system_instruction, prompt)
+        if self.cache is not None and reaproveitar:
+            resposta_em_cache = self.cache.obter(chave)
+            if resposta_em_cache is not None:
+                print(f"♻️ Agente '{self.nome}' reutilizou uma resposta do cache.")
+                yield resposta_em_cache
+                return "cache"
+        estimativa = estimar_tokens(self.system_instruction + prompt)
+        resposta = self.limitador.executar(
+            lambda: self.model.generate_content(prompt, stream=True), estimativa, descricao=f"Agente '{self.nome}'",
+        )
+        pedacos = []
+        for chunk in resposta:
+            pedacos.append(chunk.text)
+            yield chunk.text
+        # No Gemini, o uso de tokens fica disponível na resposta depois de consumidos todos os pedaços.
+        self._registrar_resposta(getattr(resposta, "usage_metadata", None), "".join(pedacos), estimativa, chave)
+        print(f"✅ Agente '{self.nome}' concluiu a tarefa!")
+        return "modelo"
+
+
+class RegistroAgentes:
+    """
+    Registro de agentes com construção sob demanda.
+
+    Funciona como um dicionário somente-leitura de nome → Agente: `registro[nome]`
+    constrói o agente na primeira vez (com lock, seguro entre threads) e
+    reaproveita a mesma instância nas chamadas seguintes.
+    """
+
+    def __init__(self):
+        self._especificacoes: Dict[str, dict] = {}
+        self._agentes: Dict[str, Agente] = {}
+        self._lock = threading.Lock()
+        self.segundos_construindo = 0.0
+
+    def registrar(self, nome: str, system_instruction: str, **opcoes) -> None:
+        """Registra a especificação de um agente. Nomes repetidos são um erro."""
+        if nome in self._especificacoes:
+            raise ValueError(f"O agente '{nome}' já está registrado.")
+        self._especificacoes[nome] = {"nome": nome, "system_instruction": system_instruction, **opcoes}
+
+    def __getitem__(self, nome: str) -> Agente:
+        agente = self._agentes.get(nome)
+        if agente is not None:
+            return agente
+        with self._lock:
+            agente = self._agentes.get(nome)
+            if agente is None:
+                inicio = time.perf_counter()
+                agente = self._agentes[nome] = Agente(**self._especificacoes[nome])
+                self.segundos_construindo += time.perf_counter() - inicio
+            return agente
+
+    def __setitem__(self, nome: str, agente) -> None:
+        """Substitui a instância de um agente (útil para trocar o backend em testes)."""
+        with self._lock:
+            self._especificacoes.setdefault(nome, {"nome": nome, "system_instruction": getattr(agente, "system_instruction", "")})
+            self._agentes[nome] = agente
+
+    def __contains__(self, nome: str) -> bool:
+        return nome in self._especificacoes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._especificacoes))
+
+    def __len__(self) -> int:
+        return len(self._especificacoes)
+
+    def keys(self):
+        return list(self._especificacoes)
+
+    def values(self):
+        return [self[nome] for nome in self._especificacoes]
+
+    def construidos(self) -> list:
+        """Nomes dos agentes que já foram construídos neste processo."""
+        with self._lock:
+            return list(self._agentes)
@@ -1,10 +1,28 @@
 # Este é o conteúdo para o arquivo app.py
 
+import time
+INICIO_IMPORTACAO = time.perf_counter()
+
 import os
+import json
+import re
+import uuid
 import google.generativeai as genai
-import textwrap
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, send_file, stream_with_context
+from acervo import criar_acervo_padrao
+from agentes import RegistroAgentes
+from cache_respostas import cache_padrao
+from artefatos import criar_armazem_padrao, impressoes_etapas
+from chamada_unica import chamadas_pipeline, transmissoes_pipeline
+from contexto import INSTRUCAO_COMPACTADOR, NOME_COMPACTADOR, criar_orcamento_padrao
+from fila_jobs import criar_fila_padrao
+from limitador import limitador_padrao
+from lote import processar_lote
+from metricas import historico_traces, pipelines_em_andamento, registro_metricas
+from orquestrador import Etapa, executar_pipeline
+from reserva import criar_reserva_padrao
+from urls import normalizar_url
 
 # --- PARTE 1: CONFIGURAÇÃO INICIAL ---
 load_dotenv()
@@ -21,93 +39,364 @@ app = Flask(__name__)
 
 # ==============================================================================
 # PARTE 2: A CLASSE 'AGENTE'
+# (Definida em agentes.py, compartilhada com a versão de linha de comando)
 # ==============================================================================
-class Agente:
-    def __init__(self, nome: str, system_instruction: str, model_name: str = "gemini-1.5-flash"):
-        self.nome = nome
-        self.system_instruction = textwrap.dedent(system_instruction)
-        self.model = genai.GenerativeModel(model_name=model_name, system_instruction=self.system_instruction)
-        print(f"🤖 Agente '{self.nome}' contratado e pronto para o trabalho!")
-
-    def executar(self, tarefa: str, contexto: str = None) -> str:
-        print(f"⏳ Agente '{self.nome}' iniciando tarefa...")
-        prompt = f"TAREFA: {tarefa}"
-        if contexto:
-            prompt = f"CONTEXTO PARA REALIZAR A TAREFA:\n---\n{contexto}\n---\n\n{prompt}"
-        try:
-            response = self.model.generate_content(prompt)
-            print(f"✅ Agente '{self.nome}' concluiu a tarefa!")
-            return response.text
-        except Exception as e:
-            print(f"❌ Erro ao executar o agente '{self.nome}': {e}")
-            return f"Erro: Não foi possível completar a tarefa. Motivo: {e}"
 
 # ==============================================================================
 # PARTE 3: A FÁBRICA DE AGENTES
 # ==============================================================================
 print("\n" + "="*80 + "\nINICIANDO A FÁBRICA DE AGENTES...\n" + "="*80)
-meus_agentes = {
-    "Analisador de Negócios": Agente(
-        nome="Analisador de Negócios",
-        system_instruction="""Você é um analista de negócios sênior. Sua única função é receber uma URL e descrever em um parágrafo conciso: 1. O modelo de negócio do site. 2. O público-alvo principal. 3. O propósito central ou o problema que ele resolve. Sua resposta deve ser apenas este parágrafo de análise."""
-    ),
-    "Engenheiro de UI/UX": Agente(
-        nome="Engenheiro de UI/UX",
-        system_instruction="""Você é um engenheiro de Front-end e especialista em UI/UX. Com base em um conceito de negócio (contexto), sua tarefa é listar os 5 a 7 componentes de interface e funcionalidades essenciais que um usuário veria e com os quais interagiria no site. Formate a resposta como uma lista de tópicos (bullet points)."""
-    ),
-    "Arquiteto de Back-End": Agente(
-        nome="Arquiteto de Back-End",
-        system_instruction="""Você é um arquiteto de software especializado em Back-end. Com base em uma lista de funcionalidades de front-end (contexto), sua tarefa é projetar os recursos de back-end necessários. Descreva: 1. Os principais modelos de dados (tabelas de banco de dados). 2. Os 3 ou 4 endpoints de API mais importantes (ex: GET /users, POST /items). Seja técnico e direto."""
-    ),
-    "Desenvolvedor de Conteúdo Didático": Agente(
-        nome="Desenvolvedor de Conteúdo Didático",
-        system_instruction="""Você é um educador de programação. Sua função é receber especificações de front-end e back-end (contexto) e transformá-las em um desafio de programação claro e estruturado. Organize a atividade em "Parte 1: Front-End" e "Parte 2: Back-End", detalhando as tarefas de forma lógica para um aluno. Sua resposta deve ser o rascunho da atividade."""
+meus_agentes = RegistroAgentes()
+meus_agentes.registrar(
+    "Analisador de Negócios",
+    system_instruction="""Você é um analista de negócios sênior. Sua única função é receber uma URL e descrever em um parágrafo conciso: 1. O modelo de negócio do site. 2. O público-alvo principal. 3. O propósito central ou o problema que ele resolve. Sua resposta deve ser apenas este parágrafo de análise."""
+)
+meus_agentes.registrar(
+    "Engenheiro de UI/UX",
+    system_instruction="""Você é um engenheiro de Front-end e especialista em UI/UX. Com base em um conceito de negócio (contexto), sua tarefa é listar os 5 a 7 componentes de interface e funcionalidades essenciais que um usuário veria e com os quais interagiria no site. Formate a resposta como uma lista de tópicos (bullet points)."""
+)
+meus_agentes.registrar(
+    "Arquiteto de Back-End",
+    system_instruction="""Você é um arquiteto de software especializado em Back-end. Com base em uma lista de funcionalidades de front-end (contexto), sua tarefa é projetar os recursos de back-end necessários. Descreva: 1. Os principais modelos de dados (tabelas de banco de dados). 2. Os 3 ou 4 endpoints de API mais importantes (ex: GET /users, POST /items). Seja técnico e direto."""
+)
+meus_agentes.registrar(
+    "Desenvolvedor de Conteúdo Didático",
+    system_instruction="""Você é um educador de programação. Sua função é receber especificações de front-end e back-end (contexto) e transformá-las em um desafio de programação claro e estruturado. Organize a atividade em "Parte 1: Front-End" e "Parte 2: Back-End", detalhando as tarefas de forma lógica para um aluno. Sua resposta deve ser o rascunho da atividade."""
+)
+meus_agentes.registrar(
+    "Revisor Pedagógico",
+    system_instruction="""Você é um professor experiente com uma didática impecável. Sua tarefa é receber um rascunho de uma atividade de programação (contexto) e aprimorá-la. Seu trabalho é: 1. Simplificar a linguagem para torná-la mais clara e motivadora. 2. Formatar o texto perfeitamente usando títulos, listas e negrito para fácil leitura. 3. Adicionar uma seção "Conselho do Mestre" ao final de cada parte (Front-end e Back-end) com uma dica útil que não entregue a resposta."""
+)
+meus_agentes.registrar(
+    "Explorador Web Aleatório",
+    system_instruction="""
+        Você é um explorador web. Sua função é escolher uma URL de um site popular, educativo ou interessante de forma aleatória.
+        Retorne apenas a URL escolhida, sem explicações. Evite sites impróprios ou de conteúdo sensível.
+    """,
+    # A escolha precisa ser aleatória a cada chamada: sem cache e sem compartilhar chamadas simultâneas.
+    cache=None,
+    coalescer=False,
+)
+meus_agentes.registrar(
+    "Dicas de Carreira",
+    system_instruction="""Você é um orientador de carreira em tecnologia. Receba um desafio de programação (contexto) e relacione-o com oportunidades de carreira, áreas de atuação e habilidades valorizadas no mercado, com dicas práticas para o aluno."""
+)
+meus_agentes.registrar(
+    "Testes Automatizados",
+    system_instruction="""Você é um engenheiro de testes. Receba um desafio de programação (contexto) e sugira de 3 a 5 testes automatizados para validar as soluções dos alunos, explicando o objetivo de cada um."""
+)
+meus_agentes.registrar(NOME_COMPACTADOR, system_instruction=INSTRUCAO_COMPACTADOR)
+print("\n" + "="*80 + f"\nFÁBRICA CONCLUÍDA: {len(meus_agentes)} agentes registrados (construídos no primeiro uso).\n" + "="*80)
+
+# --- Grafo de etapas: cada uma declara de quais resultados depende ---
+ETAPAS_PIPELINE = [
+    Etapa("conceito", "Analisador de Negócios", lambda r: f"Analise a URL: {r['url']}"),
+    Etapa("frontend", "Engenheiro de UI/UX", "Liste os componentes de UI/UX.", ("conceito",)),
+    Etapa("backend", "Arquiteto de Back-End", "Projete a API e os modelos de dados.", ("frontend",)),
+    Etapa(
+        "rascunho", "Desenvolvedor de Conteúdo Didático", "Crie o desafio de programação.", ("frontend", "backend"),
+        contexto=lambda r: f"Especificações de Front-End:\n{r['frontend']}\n\nEspecificações de Back-End:\n{r['backend']}",
     ),
-    "Revisor Pedagógico": Agente(
-        nome="Revisor Pedagógico",
-        system_instruction="""Você é um professor experiente com uma didática impecável. Sua tarefa é receber um rascunho de uma atividade de programação (contexto) e aprimorá-la. Seu trabalho é: 1. Simplificar a linguagem para torná-la mais clara e motivadora. 2. Formatar o texto perfeitamente usando títulos, listas e negrito para fácil leitura. 3. Adicionar uma seção "Conselho do Mestre" ao final de cada parte (Front-end e Back-end) com uma dica útil que não entregue a resposta."""
-    )
+    Etapa("final", "Revisor Pedagógico", "Revise e formate esta atividade.", ("rascunho",), compactavel=False),
+]
+
+# --- Seções extras opcionais, pedidas com {"extras": ["carreira", ...]} ---
+ETAPAS_EXTRAS = {
+    "carreira": Etapa("carreira", "Dicas de Carreira", "Relacione o desafio com oportunidades de carreira.", ("rascunho",)),
+    "testes": Etapa("testes", "Testes Automatizados", "Sugira testes automatizados para o desafio.", ("rascunho",)),
 }
-print("\n" + "="*80 + f"\nFÁBRICA CONCLUÍDA: {len(meus_agentes)} agentes contratados.\n" + "="*80)
+
+# --- Orçamento de tokens do contexto passado entre as etapas ---
+ORCAMENTO_CONTEXTO = criar_orcamento_padrao()
+
+# --- Artefatos das etapas: só recalcula o que mudou desde a última execução ---
+ARMAZEM_ARTEFATOS = criar_armazem_padrao()
+
+# --- Acervo das atividades geradas: pedidos repetidos viram uma leitura ---
+ACERVO_ATIVIDADES = criar_acervo_padrao()
 
 # ==============================================================================
 # PARTE 4: ROTA DA API QUE ORQUESTRA OS AGENTES
 # ==============================================================================
-@app.route('/gerar-atividade', methods=['POST'])
+def resolver_url_inicial(data: dict):
+    """Retorna a URL da atividade: a informada pelo usuário ou uma escolhida pelo explorador."""
+    if data.get('modo', 'manual') == 'aleatorio':
+        url = meus_agentes["Explorador Web Aleatório"].executar(tarefa="Escolha uma URL aleatória.")
+        print(f"\n🌐 URL escolhida pelo agente: {url}")
+        return url
+    return data.get('url')
+
+def atividade_do_acervo(url: str, extras=()):
+    """A última atividade gerada para a URL (com as seções extras pedidas), no formato de gerar_atividade."""
+    if ACERVO_ATIVIDADES is None:
+        return None
+    # Só vale uma atividade gerada pelas mesmas etapas: mudou um agente, a busca cai nos artefatos.
+    etapas = ETAPAS_PIPELINE + [ETAPAS_EXTRAS[nome] for nome in extras]
+    atividade = ACERVO_ATIVIDADES.mais_recente(url, extras, impressoes_etapas(etapas, meus_agentes))
+    if atividade is None:
+        return None
+    print(f"📚 Atividade para {url} servida do acervo (id {atividade['id']}).")
+    return {
+        "id": atividade["id"],
+        "origem": "acervo",
+        "url": url,
+        "resultado": atividade["resultado"],
+        "extras": {nome: atividade["etapas"][nome] for nome in sorted(set(extras))},
+        "etapas": atividade["etapas"],
+        "tempos": atividade["tempos"],
+        "caminho_critico": atividade["caminho_critico"],
+        "criado_em": atividade["criado_em"],
+    }
 
+def registrar_no_acervo(url: str, modo: str, execucao, etapas, extras=()):
+    """Guarda a execução no acervo e devolve o id da atividade (None com o acervo desligado)."""
+    if ACERVO_ATIVIDADES is None:
+        return None
+    modelos = {etapa.nome: meus_agentes[etapa.agente].model_name for etapa in etapas}
+    return ACERVO_ATIVIDADES.registrar(url, modo, execucao, modelos, extras, impressoes_etapas(etapas, meus_agentes))
+
+def gerar_atividade(url: str, modo: str = 'manual', ao_concluir=None, extras=(), regenerar=False) -> dict:
+    """
+    Roda a linha de montagem para uma URL já resolvida e devolve o resultado serializável.
+    Se a URL já tem uma atividade no acervo, ela é devolvida na hora. Com `regenerar`, o acervo, os artefatos
+    e o cache de respostas são ignorados na leitura: todas as etapas chamam o modelo de novo.
+    """
+    extras = tuple(sorted(set(extras)))
+    etapas = ETAPAS_PIPELINE + [ETAPAS_EXTRAS[nome] for nome in extras]
+    if not regenerar:
+        existente = atividade_do_acervo(url, extras)
+        if existente is not None:
+            return existente
+
+    def orquestrar():
+        print(f"\n🚀 Orquestração iniciada para a URL: {url}")
+        execucao = executar_pipeline(
+            etapas, meus_agentes, entradas={"url": url}, orcamento=ORCAMENTO_CONTEXTO,
+            armazem=ARMAZEM_ARTEFATOS, ao_concluir=ao_concluir, reaproveitar=not regenerar,
+        )
+        print(execucao.relatorio())
+        print("✅ Orquestração concluída com sucesso!")
+        historico_traces.registrar(url, execucao)
+        return {
+            "id": registrar_no_acervo(url, modo, execucao, etapas, extras),
+            "origem": "gerada",
+            "url": url,
+            "resultado": execucao.resultados["final"],
+            "extras": {nome: execucao.resultados[nome] for nome in extras},
+            "etapas": {nome: execucao.resultados[nome] for nome in execucao.tempos},
+            "tempos": execucao.tempos,
+            "caminho_critico": execucao.caminho_critico,
+        }
+
+    # Pedidos simultâneos para a mesma URL, modo e extras esperam uma única orquestração.
+    resultado, compartilhado = chamadas_pipeline.executar((url, modo, extras, regenerar), orquestrar)
+    if compartilhado:
+        print(f"🔗 Orquestração para {url} compartilhada com um pedido idêntico em andamento.")
+    return resultado
+
+def processar_job(dados: dict, reportar) -> dict:
+    """Roda a linha de montagem completa para um job da fila, reportando o progresso por etapa."""
+    etapas = ETAPAS_PIPELINE + [ETAPAS_EXTRAS[nome] for nome in dados.get('extras', [])]
+    for etapa in etapas:
+        reportar(etapa.nome, "pendente")
+    tarefa_inicial = normalizar_url(resolver_url_inicial(dados))
+    if not tarefa_inicial:
+        raise ValueError("O explorador não conseguiu escolher uma URL.")
+    resultado = gerar_atividade(
+        tarefa_inicial, dados.get('modo', 'manual'), ao_concluir=lambda nome, _: reportar(nome, "concluida"),
+        extras=dados.get('extras', []), regenerar=dados.get('regenerar', False),
+    )
+    # Se a orquestração foi compartilhada, este job não viu as etapas passarem.
+    for etapa in etapas:
+        reportar(etapa.nome, "concluida")
+    return resultado
+
+def processar_lote_job(dados: dict, reportar) -> dict:
+    """Gera as atividades de um lote, gravando cada uma no JSONL do lote assim que termina."""
+    caminho_saida = os.path.join(DIRETORIO_LOTES, f"{dados['lote_id']}.jsonl")
+    resumo = processar_lote(
+        dados["urls"], gerar_atividade, caminho_saida, max_paralelo=dados["concorrencia"],
+        ao_concluir=lambda url, registro: reportar(url, "erro" if "erro" in registro else "concluida"),
+    )
+    return {"lote_id": dados["lote_id"], "resultado_url": f"/lotes/{dados['lote_id']}/resultado", **resumo}
+
+# --- Reserva de atividades aleatórias, pré-geradas quando o processo está ocioso ---
+def gerar_atividade_aleatoria() -> dict:
+    """Gera uma atividade completa no modo aleatório (usada para abastecer a reserva)."""
+    url = normalizar_url(resolver_url_inicial({"modo": "aleatorio"}))
+    if not url:
+        raise ValueError("O explorador não conseguiu escolher uma URL.")
+    return gerar_atividade(url, 'aleatorio')
+
+def processo_ocioso() -> bool:
+    """Nenhuma linha de montagem em andamento e folga no limitador para uma atividade inteira."""
+    chamadas_por_atividade = len(ETAPAS_PIPELINE) + 1  # as etapas e o explorador
+    return pipelines_em_andamento.valor() == 0 and limitador_padrao.folga() >= chamadas_por_atividade
+
+def atividade_da_reserva(extras=()):
+    """Retira uma atividade aleatória pronta da reserva. A reserva não tem seções extras."""
+    if extras or RESERVA_ALEATORIA.capacidade <= 0:
+        return None
+    atividade = RESERVA_ALEATORIA.retirar()
+    if atividade is None:
+        return None
+    print(f"🎲 Atividade aleatória servida da reserva: {atividade['url']}")
+    return {**atividade, "origem": "reserva"}
+
+def eventos_atividade_pronta(atividade: dict, extras=()) -> list:
+    """
+    Eventos de streaming de uma atividade já pronta (da reserva ou do acervo): a saída
+    de cada etapa, na ordem da linha de montagem, e o evento de fim. Assim a página
+    recebe a mesma sequência que numa geração nova.
+    """
+    etapas = ETAPAS_PIPELINE + [ETAPAS_EXTRAS[nome] for nome in sorted(set(extras))]
+    eventos = [{"etapa": etapa.nome, "resultado": atividade["etapas"][etapa.nome]} for etapa in etapas]
+    eventos.append({"fim": True, "id": atividade.get("id"), "origem": atividade["origem"], "tempos": atividade["tempos"],
+                    "caminho_critico": atividade["caminho_critico"]})
+    return eventos
+
+RESERVA_ALEATORIA = criar_reserva_padrao(gerar_atividade_aleatoria, ocioso=processo_ocioso)
+
+DIRETORIO_LOTES = os.getenv("DIRETORIO_LOTES", "lotes")
+os.makedirs(DIRETORIO_LOTES, exist_ok=True)
+fila_jobs = criar_fila_padrao(processar_job)
+# Lotes têm fila própria (com poucos workers) para não ocupar os workers das atividades avulsas.
+fila_lotes = criar_fila_padrao(processar_lote_job, max_workers=1)
+
+def validar_extras(data: dict):
+    """Devolve (extras, erro): a lista de seções extras pedidas, ou o corpo da resposta 400."""
+    extras = data.get('extras', [])
+    if not isinstance(extras, list) or not all(isinstance(nome, str) for nome in extras):
+        return None, {"erro": "'extras' deve ser uma lista de nomes de seções", "disponiveis": sorted(ETAPAS_EXTRAS)}
+    desconhecidos = [nome for nome in extras if nome not in ETAPAS_EXTRAS]
+    if desconhecidos:
+        return None, {"erro": f"Seções extras desconhecidas: {desconhecidos}", "disponiveis": sorted(ETAPAS_EXTRAS)}
+    return extras, None
+
+# --- A geração roda em segundo plano: a rota só enfileira e devolve o id do job ---
+@app.route('/gerar-atividade', methods=['POST'])
 def orquestrar_agentes():
     data = request.get_json()
-    modo = data.get('modo', 'manual')
-    tarefa_inicial = data.get('url')
-
-    if modo == 'aleatorio':
-        # Adiciona o agente explorador se não existir
-        if "Explorador Web Aleatório" not in meus_agentes:
-            meus_agentes["Explorador Web Aleatório"] = Agente(
-                nome="Explorador Web Aleatório",
-                system_instruction="""
-                    Você é um explorador web. Sua função é escolher uma URL de um site popular, educativo ou interessante de forma aleatória.
-                    Retorne apenas a URL escolhida, sem explicações. Evite sites impróprios ou de conteúdo sensível.
-                """
-            )
-        tarefa_inicial = meus_agentes["Explorador Web Aleatório"].executar(tarefa="Escolha uma URL aleatória.")
-        print(f"\n🌐 URL escolhida pelo agente: {tarefa_inicial}")
-    elif not tarefa_inicial:
+    if data.get('modo', 'manual') != 'aleatorio' and not data.get('url'):
         return jsonify({"erro": "URL não fornecida"}), 400
+    extras, erro = validar_extras(data)
+    if erro:
+        return jsonify(erro), 400
+    regenerar = bool(data.get('regenerar', False))
+    # URL já gerada antes (acervo) ou atividade aleatória pronta (reserva): a resposta sai na hora, sem passar pela fila.
+    if not regenerar:
+        if data.get('modo', 'manual') == 'aleatorio':
+            existente = atividade_da_reserva(extras)
+        else:
+            existente = atividade_do_acervo(normalizar_url(data['url']), extras)
+        if existente is not None:
+            return jsonify({"status": "concluido", "resultado": existente}), 200
+    job_id = fila_jobs.enfileirar({"modo": data.get('modo', 'manual'), "url": data.get('url'), "extras": extras, "regenerar": regenerar})
+    return jsonify({"job_id": job_id, "status_url": f"/jobs/{job_id}"}), 202
 
-    print(f"\n🚀 Orquestração iniciada para a URL: {tarefa_inicial}")
+# --- Lotes: várias URLs de uma vez, com concorrência limitada e resultado em JSONL ---
+@app.route('/lotes', methods=['POST'])
+def criar_lote():
+    data = request.get_json()
+    urls = data.get('urls', [])
+    if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+        return jsonify({"erro": "'urls' deve ser uma lista de URLs"}), 400
+    urls = [url for url in urls if url.strip()]
+    if not urls:
+        return jsonify({"erro": "Nenhuma URL fornecida"}), 400
+    # Reenviar com o mesmo lote_id retoma o lote, pulando as URLs já concluídas.
+    lote_id = data.get('lote_id') or uuid.uuid4().hex
+    if not isinstance(lote_id, str) or not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", lote_id):
+        return jsonify({"erro": "lote_id inválido"}), 400
     try:
-        contexto_conceito = meus_agentes["Analisador de Negócios"].executar(tarefa=f"Analise a URL: {tarefa_inicial}")
-        contexto_frontend = meus_agentes["Engenheiro de UI/UX"].executar(tarefa="Liste os componentes de UI/UX.", contexto=contexto_conceito)
-        contexto_backend = meus_agentes["Arquiteto de Back-End"].executar(tarefa="Projete a API e os modelos de dados.", contexto=contexto_frontend)
-        contexto_para_desafio = f"Especificações de Front-End:\n{contexto_frontend}\n\nEspecificações de Back-End:\n{contexto_backend}"
-        contexto_rascunho = meus_agentes["Desenvolvedor de Conteúdo Didático"].executar(tarefa="Crie o desafio de programação.", contexto=contexto_para_desafio)
-        atividade_final = meus_agentes["Revisor Pedagógico"].executar(tarefa="Revise e formate esta atividade.", contexto=contexto_rascunho)
-        print("✅ Orquestração concluída com sucesso!")
-        return jsonify({"resultado": atividade_final})
+        concorrencia = max(1, min(int(data.get('concorrencia', 2)), 8))
+    except (TypeError, ValueError):
+        return jsonify({"erro": "concorrencia deve ser um número inteiro"}), 400
+    job_id = fila_lotes.enfileirar({"lote_id": lote_id, "urls": urls, "concorrencia": concorrencia})
+    return jsonify({"job_id": job_id, "lote_id": lote_id, "status_url": f"/jobs/{job_id}"}), 202
+
+@app.route('/lotes/<lote_id>/resultado')
+def resultado_lote(lote_id):
+    if not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", lote_id):
+        return jsonify({"erro": "lote_id inválido"}), 400
+    caminho = os.path.join(DIRETORIO_LOTES, f"{lote_id}.jsonl")
+    if not os.path.exists(caminho):
+        return jsonify({"erro": "Lote não encontrado"}), 404
+    return send_file(os.path.abspath(caminho), mimetype='application/x-ndjson')
+
+@app.route('/jobs/<job_id>')
+def consultar_job(job_id):
+    job = fila_jobs.obter(job_id)
+    if job is None:
+        return jsonify({"erro": "Job não encontrado"}), 404
+    return jsonify(job)
+
+# --- Versão em streaming (NDJSON): cada etapa é enviada assim que termina ---
+@app.route('/gerar-atividade/stream', methods=['POST'])
+def orquestrar_agentes_stream():
+    data = request.get_json()
+    if data.get('modo', 'manual') == 'aleatorio' and not data.get('regenerar'):
+        reservada = atividade_da_reserva()
+        if reservada is not None:
+            eventos = [{"etapa": "url", "resultado": reservada["url"]}, *eventos_atividade_pronta(reservada)]
+            return Response("".join(evento_ndjson(evento) for evento in eventos), mimetype='application/x-ndjson')
+    try:
+        tarefa_inicial = normalizar_url(resolver_url_inicial(data))
     except Exception as e:
-        print(f"❌ Erro fatal durante a orquestração: {e}")
         return jsonify({"erro": str(e)}), 500
+    if not tarefa_inicial:
+        return jsonify({"erro": "URL não fornecida"}), 400
+
+    modo, regenerar = data.get('modo', 'manual'), bool(data.get('regenerar'))
+    atividade = atividade_do_acervo(tarefa_inicial) if not regenerar else None
+
+    def gerar_eventos():
+        yield evento_ndjson({"etapa": "url", "resultado": tarefa_inicial})
+        if atividade is not None:
+            for evento in eventos_atividade_pronta(atividade):
+                yield evento_ndjson(evento)
+            return
+        # Pedidos idênticos simultâneos assinam a mesma transmissão: uma única linha de montagem
+        # roda numa thread própria e cada cliente recebe todos os eventos dela.
+        eventos, compartilhado = transmissoes_pipeline.assinar(
+            (tarefa_inicial, modo, regenerar),
+            lambda publicar: transmitir_atividade(tarefa_inicial, modo, regenerar, publicar),
+        )
+        if compartilhado:
+            print(f"🔗 Transmissão para {tarefa_inicial} aproveitou uma orquestração idêntica em andamento.")
+        for evento in eventos:
+            yield evento_ndjson(evento)
+
+    print(f"\n🚀 Orquestração (streaming) iniciada para a URL: {tarefa_inicial}")
+    return Response(stream_with_context(gerar_eventos()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def transmitir_atividade(url: str, modo: str, regenerar: bool, publicar) -> None:
+    """
+    Produz os eventos de /gerar-atividade/stream: cada etapa ao concluir e o
+    revisor final também token a token. Roda na thread da transmissão,
+    independente de qualquer cliente.
+    """
+    try:
+        # O revisor final roda dentro da linha de montagem (tempos, artefatos e métricas como
+        # as demais etapas), mas em streaming: cada pedaço vira um evento "parcial".
+        execucao = executar_pipeline(
+            ETAPAS_PIPELINE, meus_agentes, entradas={"url": url}, orcamento=ORCAMENTO_CONTEXTO,
+            armazem=ARMAZEM_ARTEFATOS, reaproveitar=not regenerar,
+            ao_concluir=lambda nome, resultado: publicar({"etapa": nome, "resultado": resultado}),
+            transmitir="final", ao_pedaco=lambda nome, pedaco: publicar({"etapa": nome, "parcial": pedaco}),
+        )
+        historico_traces.registrar(url, execucao)
+        atividade_id = registrar_no_acervo(url, modo, execucao, ETAPAS_PIPELINE)
+        publicar({"fim": True, "id": atividade_id, "origem": "gerada", "tempos": execucao.tempos,
+                  "caminho_critico": execucao.caminho_critico})
+        print("✅ Orquestração (streaming) concluída com sucesso!")
+    except Exception as e:
+        print(f"❌ Erro fatal durante a orquestração: {e}")
+        publicar({"erro": str(e)})
+
+def evento_ndjson(dados: dict) -> str:
+    return json.dumps(dados, ensure_ascii=False) + "\n"
 
 # ==============================================================================
 # PARTE 5: ROTA PRINCIPAL QUE SERVE A PÁGINA WEB
@@ -116,5 +405,89 @@ def orquestrar_agentes():
 def index():
     return render_template('index.html')
 
+# --- Acervo: lista, busca e leitura das atividades já geradas ---
+@app.route('/atividades')
+def listar_atividades():
+    if ACERVO_ATIVIDADES is None:
+        return jsonify({"erro": "Acervo desligado (ACERVO_DB vazio)"}), 404
+    limite = max(1, min(request.args.get('limite', 20, type=int), 100))
+    deslocamento = max(0, request.args.get('deslocamento', 0, type=int))
+    url = request.args.get('url')
+    return jsonify(ACERVO_ATIVIDADES.listar(limite, deslocamento, normalizar_url(url) if url else None))
+
+@app.route('/atividades/busca')
+def buscar_atividades():
+    if ACERVO_ATIVIDADES is None:
+        return jsonify({"erro": "Acervo desligado (ACERVO_DB vazio)"}), 404
+    texto = request.args.get('q', '').strip()
+    if not texto:
+        return jsonify({"erro": "Parâmetro 'q' não fornecido"}), 400
+    limite = max(1, min(request.args.get('limite', 20, type=int), 100))
+    return jsonify(ACERVO_ATIVIDADES.buscar(texto, limite))
+
+@app.route('/atividades/<int:atividade_id>')
+def obter_atividade(atividade_id):
+    atividade = ACERVO_ATIVIDADES.obter(atividade_id) if ACERVO_ATIVIDADES is not None else None
+    if atividade is None:
+        return jsonify({"erro": "Atividade não encontrada"}), 404
+    return jsonify(atividade)
+
+@app.route('/cache/estatisticas')
+def estatisticas_cache():
+    return jsonify(cache_padrao.estatisticas())
+
+# --- Métricas no formato Prometheus e linha do tempo das últimas execuções ---
+registro_metricas.medidor_calculado(
+    "atividades_cache_taxa_acerto", "Fração das consultas ao cache de respostas que acertaram.",
+    lambda: cache_padrao.estatisticas()["taxa_acerto"])
+registro_metricas.contador_calculado(
+    "atividades_pipeline_compartilhadas_total", "Pedidos que aproveitaram uma orquestração idêntica em andamento.",
+    lambda: (chamadas_pipeline.estatisticas()["compartilhadas"]
+             + transmissoes_pipeline.estatisticas()["compartilhadas"]))
+registro_metricas.contador_calculado(
+    "atividades_limitador_espera_segundos_total", "Tempo total de espera imposto pelo limitador de taxa.",
+    lambda: limitador_padrao.estatisticas()["segundos_em_espera"])
+if ACERVO_ATIVIDADES is not None:
+    registro_metricas.contador_calculado(
+        "atividades_acervo_acertos_total", "Pedidos atendidos na hora por uma atividade já guardada no acervo.",
+        lambda: ACERVO_ATIVIDADES.estatisticas()["acertos"])
+
+registro_metricas.medidor_calculado(
+    "atividades_agentes_construidos", "Agentes já construídos neste processo (são criados no primeiro uso).",
+    lambda: len(meus_agentes.construidos()))
+registro_metricas.medidor_calculado(
+    "atividades_agentes_construcao_segundos", "Tempo gasto construindo os agentes sob demanda.",
+    lambda: meus_agentes.segundos_construindo)
+registro_metricas.medidor_calculado(
+    "atividades_limitador_fator_taxa", "Fração do limite de requisições em uso (abaixo de 1 após erros 429).",
+    lambda: limitador_padrao.estatisticas()["fator_taxa"])
+registro_metricas.medidor_calculado(
+    "atividades_reserva_tamanho", "Atividades aleatórias prontas na reserva.",
+    lambda: RESERVA_ALEATORIA.tamanho())
+registro_metricas.medidor_calculado(
+    "atividades_reserva_taxa_acerto", "Fração dos pedidos aleatórios atendidos pela reserva.",
+    lambda: RESERVA_ALEATORIA.estatisticas()["taxa_acerto"])
+
+@app.route('/reserva/estatisticas')
+def estatisticas_reserva():
+    return jsonify(RESERVA_ALEATORIA.estatisticas())
+
+@app.route('/metrics')
+def metricas():
+    return Response(registro_metricas.exportar(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/traces')
+def traces():
+    return jsonify(historico_traces.listar())
+
+# --- A reserva começa a ser abastecida quando o app passa a atender (e não ao ser importado) ---
+@app.before_request
+def iniciar_reserva():
+    RESERVA_ALEATORIA.iniciar()
+
+# --- Tempo entre o início da importação e o app pronto para atender ---
+TEMPO_INICIALIZACAO = time.perf_counter() - INICIO_IMPORTACAO
+print(f"⚡ App pronto em {TEMPO_INICIALIZACAO * 1000:.0f} ms.")
+
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
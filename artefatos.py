@@ -0,0 +1,106 @@
+# ==============================================================================
+# ARTEFATOS DAS ETAPAS (REAVALIAÇÃO INCREMENTAL)
+# DESCRIÇÃO: Cada etapa concluída é guardada como um artefato, indexado pelas
+#            suas entradas (tarefa e contexto) e por um hash da instrução de
+#            sistema do agente. Numa nova execução, só são recalculadas as
+#            etapas cujas entradas ou instrução mudaram: ajustar o prompt do
+#            revisor ou pedir uma seção extra custa uma chamada, não cinco.
+# ==============================================================================
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+def hash_texto(texto: str) -> str:
+    return hashlib.sha256((texto or "").encode("utf-8")).hexdigest()
+
+
+def chave_artefato(etapa: str, agente, tarefa: str, contexto: Optional[str]) -> str:
+    """Chave da etapa: nome, agente, modelo, hash da instrução de sistema e as entradas."""
+    partes = (
+        etapa,
+        getattr(agente, "nome", ""),
+        getattr(agente, "model_name", ""),
+        hash_texto(getattr(agente, "system_instruction", "")),
+        tarefa,
+        contexto or "",
+    )
+    return hash_texto("\x1f".join(partes))
+
+
+def _descrever(texto) -> str:
+    """Texto fixo de uma etapa, ou o código da função que o monta (tarefas e contextos podem ser lambdas)."""
+    if texto is None or isinstance(texto, str):
+        return texto or ""
+    codigo = getattr(texto, "__code__", None)
+    return codigo.co_code.hex() + repr(codigo.co_consts) if codigo else repr(texto)
+
+
+def impressoes_etapas(etapas: Iterable, agentes) -> Dict[str, str]:
+    """
+    Impressão digital de cada etapa: agente, modelo, instrução de sistema, tarefa,
+    contexto e dependências. Uma atividade guardada só vale enquanto as impressões
+    das etapas que ela usou não mudarem.
+    """
+    impressoes = {}
+    for etapa in etapas:
+        agente = agentes[etapa.agente]
+        partes = (
+            etapa.nome,
+            getattr(agente, "nome", ""),
+            getattr(agente, "model_name", ""),
+            hash_texto(getattr(agente, "system_instruction", "")),
+            _descrever(etapa.tarefa),
+            _descrever(etapa.contexto),
+            ",".join(etapa.dependencias),
+        )
+        impressoes[etapa.nome] = hash_texto("\x1f".join(partes))
+    return impressoes
+
+
+class ArmazemArtefatos:
+    """Guarda os resultados das etapas em SQLite, sem expiração."""
+
+    def __init__(self, caminho_db: str):
+        self.caminho_db = caminho_db
+        self._lock = threading.Lock()
+        self.metricas = {"reaproveitadas": 0, "recalculadas": 0}
+        with self._conectar() as conexao:
+            conexao.execute(
+                """CREATE TABLE IF NOT EXISTS artefatos (
+                    chave TEXT PRIMARY KEY,
+                    etapa TEXT NOT NULL,
+                    valor TEXT NOT NULL,
+                    criado_em REAL NOT NULL
+                )"""
+            )
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.caminho_db, timeout=30)
+
+    def obter(self, chave: str) -> Optional[str]:
+        with self._conectar() as conexao:
+            linha = conexao.execute("SELECT valor FROM artefatos WHERE chave = ?", (chave,)).fetchone()
+        with self._lock:
+            self.metricas["reaproveitadas" if linha else "recalculadas"] += 1
+        return linha[0] if linha else None
+
+    def guardar(self, chave: str, etapa: str, valor: str) -> None:
+        with self._conectar() as conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO artefatos (chave, etapa, valor, criado_em) VALUES (?, ?, ?, ?)",
+                (chave, etapa, valor, time.time()),
+            )
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return dict(self.metricas)
+
+
+def criar_armazem_padrao() -> Optional[ArmazemArtefatos]:
+    """Cria o armazém a partir do ambiente. ARTEFATOS_DB vazio desliga a reavaliação incremental."""
+    caminho = os.getenv("ARTEFATOS_DB", "artefatos.sqlite3")
+    return ArmazemArtefatos(caminho) if caminho else None
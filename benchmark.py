@@ -0,0 +1,196 @@
+# ==============================================================================
+# BENCHMARK OFFLINE DO ORQUESTRADOR
+# DESCRIÇÃO: Roda a linha de montagem sob carga concorrente usando o modelo
+#            falso (modelos.ModeloFalso), sem rede e sem gastar cota, e mede
+#            latência ponta a ponta (p50/p95/p99), latência por etapa e vazão.
+#
+# USO: python benchmark.py --alvo ambos --requisicoes 40 --concorrencia 8 \
+#          --latencia-ms 200 --taxa-429 0.05
+#      python benchmark.py --alvo async --requisicoes 500 --concorrencia 200
+# ==============================================================================
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, List
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil pelo método do posto mais próximo (0 se a lista estiver vazia)."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posto = max(1, math.ceil(p / 100 * len(ordenados)))
+    return ordenados[posto - 1]
+
+
+def configurar_ambiente(argumentos) -> None:
+    """Aponta o app para o modelo falso e para arquivos temporários. Precisa rodar antes dos imports."""
+    diretorio = tempfile.mkdtemp(prefix="benchmark-")
+    os.environ.update({
+        "BACKEND_MODELO": "falso",
+        "MODELO_FALSO_LATENCIA_MS": str(argumentos.latencia_ms),
+        "MODELO_FALSO_JITTER_MS": str(argumentos.jitter_ms),
+        "MODELO_FALSO_TOKENS_SAIDA": str(argumentos.tokens_saida),
+        "MODELO_FALSO_TAXA_ERRO": str(argumentos.taxa_erro),
+        "MODELO_FALSO_TAXA_429": str(argumentos.taxa_429),
+        "MODELO_FALSO_SEMENTE": str(argumentos.semente),
+        "LIMITE_RPM": str(argumentos.rpm),
+        "LIMITE_ESPERA_BASE": str(argumentos.espera_base),
+        "CACHE_RESPOSTAS_DB": "",
+        "ARTEFATOS_DB": "",
+        "ACERVO_DB": "",
+        "RESERVA_ALEATORIA_TAMANHO": "0",
+        "FILA_JOBS_DB": os.path.join(diretorio, "jobs.sqlite3"),
+        "FILA_JOBS_WORKERS": str(argumentos.concorrencia),
+        "DIRETORIO_LOTES": os.path.join(diretorio, "lotes"),
+    })
+
+
+def medir(executar: Callable[[str], dict], urls: List[str], concorrencia: int) -> dict:
+    """Roda `executar(url)` para todas as URLs com a concorrência dada e agrega as medidas."""
+    def rodar(url: str):
+        inicio = time.perf_counter()
+        try:
+            resultado = executar(url)
+        except Exception as e:
+            return None, time.perf_counter() - inicio, str(e)
+        return resultado, time.perf_counter() - inicio, None
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        medidas = list(executor.map(rodar, urls))
+    return agregar(medidas, time.perf_counter() - inicio)
+
+
+def medir_async(executar: Callable[[str], Awaitable[dict]], urls: List[str], concorrencia: int) -> dict:
+    """Como medir, mas com corrotinas num único loop do asyncio, sem uma thread por requisição."""
+    async def rodar_todas():
+        limite = asyncio.Semaphore(concorrencia)
+
+        async def rodar(url: str):
+            async with limite:
+                inicio = time.perf_counter()
+                try:
+                    resultado = await executar(url)
+                except Exception as e:
+                    return None, time.perf_counter() - inicio, str(e)
+                return resultado, time.perf_counter() - inicio, None
+        return await asyncio.gather(*(rodar(url) for url in urls))
+
+    inicio = time.perf_counter()
+    medidas = asyncio.run(rodar_todas())
+    return agregar(medidas, time.perf_counter() - inicio)
+
+
+def agregar(medidas: List[tuple], duracao: float) -> dict:
+    """Agrega as tuplas (resultado, latência, erro) de cada requisição."""
+    latencias, por_etapa, erros = [], {}, 0
+    for resultado, latencia, erro in medidas:
+        if erro:
+            erros += 1
+            continue
+        latencias.append(latencia)
+        for etapa, tempos in resultado.get("tempos", {}).items():
+            por_etapa.setdefault(etapa, []).append(tempos["duracao"])
+
+    return {
+        "requisicoes": len(medidas),
+        "erros": erros,
+        "segundos": duracao,
+        "vazao_por_minuto": len(latencias) / (duracao / 60) if duracao > 0 else 0.0,
+        "latencia": {f"p{p}": percentil(latencias, p) for p in (50, 95, 99)},
+        "etapas": {
+            etapa: {f"p{p}": percentil(valores, p) for p in (50, 95, 99)}
+            for etapa, valores in por_etapa.items()
+        },
+    }
+
+
+def alvo_cli() -> Callable[[str], dict]:
+    import Agentes_de_Atividades
+    return Agentes_de_Atividades.gerar_atividade
+
+
+def alvo_flask(intervalo_consulta: float = 0.02) -> Callable[[str], dict]:
+    """Dirige a rota /gerar-atividade pelo cliente de teste do Flask, consultando o job até terminar."""
+    import app as aplicacao
+    cliente = aplicacao.app.test_client()
+
+    def executar(url: str) -> dict:
+        resposta = cliente.post("/gerar-atividade", json={"url": url, "modo": "manual"})
+        if resposta.status_code != 202:
+            raise RuntimeError(f"HTTP {resposta.status_code}: {resposta.get_json()}")
+        status_url = resposta.get_json()["status_url"]
+        while True:
+            job = cliente.get(status_url).get_json()
+            if job["status"] == "concluido":
+                return job["resultado"]
+            if job["status"] == "erro":
+                raise RuntimeError(job["erro"])
+            time.sleep(intervalo_consulta)
+    return executar
+
+
+def alvo_async() -> Callable[[str], Awaitable[dict]]:
+    import servidor_async
+    return servidor_async.gerar_atividade_async
+
+
+def imprimir_relatorio(nome: str, medidas: dict) -> None:
+    lat = medidas["latencia"]
+    print(f"\n=== {nome.upper()} ===")
+    print(f"Requisições: {medidas['requisicoes']}  erros: {medidas['erros']}  tempo: {medidas['segundos']:.2f}s  "
+          f"vazão: {medidas['vazao_por_minuto']:.1f} atividades/min")
+    print(f"Latência ponta a ponta: p50 {lat['p50']:.3f}s  p95 {lat['p95']:.3f}s  p99 {lat['p99']:.3f}s")
+    for etapa, valores in medidas["etapas"].items():
+        print(f"  {etapa:<14} p50 {valores['p50']:.3f}s  p95 {valores['p95']:.3f}s  p99 {valores['p99']:.3f}s")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark offline da linha de montagem de agentes.")
+    parser.add_argument("--alvo", choices=("cli", "flask", "async", "ambos"), default="ambos")
+    parser.add_argument("--requisicoes", type=int, default=20)
+    parser.add_argument("--concorrencia", type=int, default=4)
+    parser.add_argument("--latencia-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--tokens-saida", type=int, default=400)
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de chamadas com erro 503.")
+    parser.add_argument("--taxa-429", type=float, default=0.0, help="Fração de chamadas com erro 429.")
+    parser.add_argument("--rpm", type=float, default=100000, help="Limite de requisições por minuto do limitador.")
+    parser.add_argument("--espera-base", type=float, default=0.05, help="Espera base do backoff, em segundos.")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--json", help="Grava o relatório completo neste arquivo.")
+    parser.add_argument("--verboso", action="store_true", help="Mostra os logs dos agentes durante a carga.")
+    argumentos = parser.parse_args()
+
+    configurar_ambiente(argumentos)
+    alvos = ("cli", "flask") if argumentos.alvo == "ambos" else (argumentos.alvo,)
+    relatorio: Dict[str, dict] = {}
+    for nome in alvos:
+        # URLs únicas por alvo, para não medir acertos de cache ou chamadas compartilhadas.
+        urls = [f"https://{nome}-{i}.benchmark.example" for i in range(argumentos.requisicoes)]
+        saida = sys.stdout if argumentos.verboso else io.StringIO()
+        with contextlib.redirect_stdout(saida):
+            if nome == "async":
+                relatorio[nome] = medir_async(alvo_async(), urls, argumentos.concorrencia)
+            else:
+                executar = alvo_cli() if nome == "cli" else alvo_flask()
+                relatorio[nome] = medir(executar, urls, argumentos.concorrencia)
+        imprimir_relatorio(nome, relatorio[nome])
+
+    if argumentos.json:
+        with open(argumentos.json, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# ==============================================================================
+# CACHE DE RESPOSTAS DOS AGENTES
+# DESCRIÇÃO: Guarda as respostas do modelo indexadas por um hash de
+#            (modelo, instrução de sistema, prompt). Tem duas camadas:
+#            memória (LRU com TTL, via cachetools) e disco (SQLite), para que
+#            os resultados sobrevivam ao reinício dos workers do gunicorn.
+# ==============================================================================
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from cachetools import TTLCache
+
+
+def gerar_chave(model_name: str, system_instruction: str, prompt: str) -> str:
+    """Gera a chave de conteúdo (SHA-256) para uma chamada ao modelo."""
+    conteudo = "\x1f".join((model_name, system_instruction, prompt))
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+class CacheRespostas:
+    """Cache de duas camadas (memória + SQLite) com métricas de acerto e falha."""
+
+    def __init__(self, caminho_db: Optional[str] = None, max_itens: int = 512, ttl_segundos: float = 24 * 3600,
+                 intervalo_limpeza: float = 3600):
+        self.ttl_segundos = ttl_segundos
+        # De quanto em quanto tempo uma gravação também apaga do disco as respostas vencidas.
+        self.intervalo_limpeza = intervalo_limpeza
+        self._ultima_limpeza = time.time()
+        self.caminho_db = caminho_db
+        self._memoria = TTLCache(maxsize=max_itens, ttl=ttl_segundos)
+        self._lock = threading.Lock()
+        self.metricas = {"acertos_memoria": 0, "acertos_disco": 0, "falhas": 0, "gravacoes": 0}
+        if caminho_db:
+            with self._conectar() as conexao:
+                conexao.execute(
+                    "CREATE TABLE IF NOT EXISTS respostas (chave TEXT PRIMARY KEY, valor TEXT NOT NULL, criado_em REAL NOT NULL)"
+                )
+            self.limpar_expirados()
+
+    def _conectar(self) -> sqlite3.Connection:
+        # Uma conexão por operação: o SQLite não permite compartilhar conexões entre threads.
+        return sqlite3.connect(self.caminho_db, timeout=30)
+
+    def obter(self, chave: str) -> Optional[str]:
+        """Procura a resposta na memória e depois no disco. Retorna None em caso de falha."""
+        with self._lock:
+            valor = self._memoria.get(chave)
+            if valor is not None:
+                self.metricas["acertos_memoria"] += 1
+                return valor
+
+        if self.caminho_db:
+            with self._conectar() as conexao:
+                linha = conexao.execute(
+                    "SELECT valor, criado_em FROM respostas WHERE chave = ?", (chave,)
+                ).fetchone()
+            if linha and time.time() - linha[1] < self.ttl_segundos:
+                with self._lock:
+                    self._memoria[chave] = linha[0]
+                    self.metricas["acertos_disco"] += 1
+                return linha[0]
+
+        with self._lock:
+            self.metricas["falhas"] += 1
+        return None
+
+    def guardar(self, chave: str, valor: str) -> None:
+        """Guarda a resposta nas duas camadas."""
+        with self._lock:
+            self._memoria[chave] = valor
+            self.metricas["gravacoes"] += 1
+        if self.caminho_db:
+            with self._conectar() as conexao:
+                conexao.execute(
+                    "INSERT OR REPLACE INTO respostas (chave, valor, criado_em) VALUES (?, ?, ?)",
+                    (chave, valor, time.time()),
+                )
+            with self._lock:
+                limpar = time.time() - self._ultima_limpeza >= self.intervalo_limpeza
+                if limpar:
+                    self._ultima_limpeza = time.time()
+            if limpar:
+                removidas = self.limpar_expirados()
+                if removidas:
+                    print(f"🧹 Cache de respostas: {removidas} respostas vencidas removidas do disco.")
+
+    def limpar_expirados(self) -> int:
+        """Remove do disco as respostas com TTL vencido. Retorna quantas foram removidas."""
+        if not self.caminho_db:
+            return 0
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                "DELETE FROM respostas WHERE criado_em < ?", (time.time() - self.ttl_segundos,)
+            )
+            return cursor.rowcount
+
+    def estatisticas(self) -> dict:
+        """Retorna as métricas de acerto/falha e a taxa de acerto."""
+        with self._lock:
+            dados = dict(self.metricas)
+            dados["itens_em_memoria"] = len(self._memoria)
+        acertos = dados["acertos_memoria"] + dados["acertos_disco"]
+        total = acertos + dados["falhas"]
+        dados["taxa_acerto"] = acertos / total if total else 0.0
+        return dados
+
+
+# --- Cache compartilhado por todos os agentes do processo ---
+# Configurável por variáveis de ambiente; CACHE_RESPOSTAS_DB vazio desliga o disco.
+cache_padrao = CacheRespostas(
+    caminho_db=os.getenv("CACHE_RESPOSTAS_DB", "cache_respostas.sqlite3") or None,
+    max_itens=int(os.getenv("CACHE_RESPOSTAS_MAX_ITENS", "512")),
+    ttl_segundos=float(os.getenv("CACHE_RESPOSTAS_TTL", str(24 * 3600))),
+    intervalo_limpeza=float(os.getenv("CACHE_RESPOSTAS_INTERVALO_LIMPEZA", "3600")),
+)
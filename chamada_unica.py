@@ -0,0 +1,207 @@
+# ==============================================================================
+# CHAMADA ÚNICA (SINGLE-FLIGHT)
+# DESCRIÇÃO: Quando várias threads pedem a mesma coisa ao mesmo tempo (ex: 30
+#            alunos enviando a mesma URL), só a primeira executa o trabalho; as
+#            demais esperam e recebem o mesmo resultado (ou a mesma exceção).
+#            Há uma versão para threads e outra para corrotinas (asyncio), e
+#            uma para produções transmitidas em eventos (streaming), em que cada
+#            assinante recebe todos os eventos do mesmo produtor.
+# ==============================================================================
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Hashable, Iterator, Tuple
+
+
+class _ChamadaEmAndamento:
+    def __init__(self):
+        self.concluida = threading.Event()
+        self.resultado = None
+        self.erro = None
+        self.seguidores = 0
+
+
+class ChamadaUnica:
+    """Agrupa chamadas concorrentes com a mesma chave numa única execução."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento: Dict[Hashable, _ChamadaEmAndamento] = {}
+        self.metricas = {"execucoes": 0, "compartilhadas": 0}
+
+    def executar(self, chave: Hashable, funcao: Callable[[], object]) -> Tuple[object, bool]:
+        """
+        Executa `funcao()` uma única vez por chave entre chamadas simultâneas.
+        Retorna (resultado, compartilhado), onde `compartilhado` indica que o
+        resultado veio de uma execução iniciada por outra thread.
+        """
+        with self._lock:
+            chamada = self._em_andamento.get(chave)
+            if chamada is not None:
+                chamada.seguidores += 1
+                self.metricas["compartilhadas"] += 1
+                lider = False
+            else:
+                chamada = self._em_andamento[chave] = _ChamadaEmAndamento()
+                self.metricas["execucoes"] += 1
+                lider = True
+
+        if not lider:
+            chamada.concluida.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado, True
+
+        try:
+            chamada.resultado = funcao()
+        except Exception as e:
+            chamada.erro = e
+            raise
+        finally:
+            # Remove antes de liberar os seguidores: quem chegar depois inicia uma nova execução.
+            with self._lock:
+                del self._em_andamento[chave]
+            chamada.concluida.set()
+        return chamada.resultado, False
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            dados = dict(self.metricas)
+            dados["em_andamento"] = len(self._em_andamento)
+        return dados
+
+
+class _TarefaEmAndamento:
+    def __init__(self, tarefa: asyncio.Future):
+        self.tarefa = tarefa
+        self.interessados = 0
+
+
+class ChamadaUnicaAsync:
+    """
+    Versão para asyncio: corrotinas com a mesma chave aguardam uma única tarefa.
+
+    A tarefa só é cancelada quando todas as corrotinas que esperam por ela são
+    canceladas (ex: todos os clientes desconectaram).
+    """
+
+    def __init__(self):
+        self._em_andamento: Dict[Hashable, _TarefaEmAndamento] = {}
+        self.metricas = {"execucoes": 0, "compartilhadas": 0}
+
+    async def executar(self, chave: Hashable, funcao: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        """Igual a ChamadaUnica.executar, mas `funcao()` devolve uma corrotina."""
+        # Tarefas pertencem a um loop: a chave inclui o loop em execução.
+        chave = (id(asyncio.get_running_loop()), chave)
+        chamada = self._em_andamento.get(chave)
+        compartilhado = chamada is not None
+        if chamada is None:
+            chamada = self._em_andamento[chave] = _TarefaEmAndamento(asyncio.ensure_future(funcao()))
+            chamada.tarefa.add_done_callback(lambda _: self._remover(chave, chamada))
+            self.metricas["execucoes"] += 1
+        else:
+            self.metricas["compartilhadas"] += 1
+
+        chamada.interessados += 1
+        try:
+            return await asyncio.shield(chamada.tarefa), compartilhado
+        finally:
+            chamada.interessados -= 1
+            if chamada.interessados == 0 and not chamada.tarefa.done():
+                chamada.tarefa.cancel()
+
+    def _remover(self, chave: Hashable, chamada: _TarefaEmAndamento) -> None:
+        if self._em_andamento.get(chave) is chamada:
+            del self._em_andamento[chave]
+
+    def estatisticas(self) -> dict:
+        dados = dict(self.metricas)
+        dados["em_andamento"] = len(self._em_andamento)
+        return dados
+
+
+class _TransmissaoEmAndamento:
+    def __init__(self):
+        self.condicao = threading.Condition()
+        self.eventos = []
+        self.encerrada = False
+
+    def publicar(self, evento) -> None:
+        with self.condicao:
+            self.eventos.append(evento)
+            self.condicao.notify_all()
+
+    def encerrar(self) -> None:
+        with self.condicao:
+            self.encerrada = True
+            self.condicao.notify_all()
+
+    def acompanhar(self) -> Iterator:
+        """Todos os eventos publicados, desde o primeiro, até o produtor encerrar."""
+        posicao = 0
+        while True:
+            with self.condicao:
+                while posicao >= len(self.eventos) and not self.encerrada:
+                    self.condicao.wait()
+                if posicao >= len(self.eventos):
+                    return
+                evento = self.eventos[posicao]
+            posicao += 1
+            yield evento
+
+
+class TransmissaoUnica:
+    """
+    Single-flight para produções em streaming: assinaturas simultâneas com a
+    mesma chave compartilham um único produtor, e cada assinante recebe todos
+    os eventos dele (quem chega atrasado recebe também os já publicados).
+
+    O produtor roda numa thread própria: se um cliente desconectar, os demais
+    continuam recebendo e a produção vai até o fim.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento: Dict[Hashable, _TransmissaoEmAndamento] = {}
+        self.metricas = {"execucoes": 0, "compartilhadas": 0}
+
+    def assinar(self, chave: Hashable, produzir: Callable[[Callable[[object], None]], None]) -> Tuple[Iterator, bool]:
+        """
+        Assina a produção da chave, iniciando `produzir(publicar)` se não houver
+        uma em andamento. Retorna (eventos, compartilhado), onde `eventos` é um
+        iterador bloqueante sobre o que o produtor publicar.
+        """
+        with self._lock:
+            transmissao = self._em_andamento.get(chave)
+            compartilhado = transmissao is not None
+            if compartilhado:
+                self.metricas["compartilhadas"] += 1
+            else:
+                transmissao = self._em_andamento[chave] = _TransmissaoEmAndamento()
+                self.metricas["execucoes"] += 1
+        if not compartilhado:
+            threading.Thread(target=self._produzir, args=(chave, transmissao, produzir), daemon=True).start()
+        return transmissao.acompanhar(), compartilhado
+
+    def _produzir(self, chave: Hashable, transmissao: _TransmissaoEmAndamento, produzir) -> None:
+        try:
+            produzir(transmissao.publicar)
+        finally:
+            # Remove antes de encerrar: quem assinar depois inicia uma nova produção.
+            with self._lock:
+                del self._em_andamento[chave]
+            transmissao.encerrar()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            dados = dict(self.metricas)
+            dados["em_andamento"] = len(self._em_andamento)
+        return dados
+
+
+# --- Instâncias compartilhadas pelo processo ---
+# Uma para chamadas individuais ao modelo, outra para a linha de montagem inteira
+# e outra para a linha de montagem transmitida em streaming.
+chamadas_modelo = ChamadaUnica()
+chamadas_pipeline = ChamadaUnica()
+chamadas_modelo_async = ChamadaUnicaAsync()
+transmissoes_pipeline = TransmissaoUnica()
@@ -0,0 +1,84 @@
+# ==============================================================================
+# ORÇAMENTO DE CONTEXTO ENTRE AS ETAPAS
+# DESCRIÇÃO: A saída de um agente vira o contexto do próximo. Para que o prompt
+#            não cresça sem limite, o contexto é medido em tokens e, se passar
+#            do orçamento, é trocado por uma versão compactada (resumo
+#            estruturado) feita por um agente compactador.
+# ==============================================================================
+import os
+from typing import Optional
+
+from limitador import estimar_tokens
+
+# Instrução do agente compactador, registrado pelo app e pela CLI.
+NOME_COMPACTADOR = "Compactador de Contexto"
+INSTRUCAO_COMPACTADOR = """
+    Você é um editor técnico. Receba um texto (contexto) e reescreva-o de forma compacta, preservando
+    todos os fatos necessários para a próxima etapa: nomes de componentes, modelos de dados, campos,
+    endpoints, público-alvo e objetivos. Use listas curtas, sem introduções nem conclusões.
+"""
+
+
+class OrcamentoContexto:
+    """Limita o tamanho do contexto passado entre etapas, compactando quando necessário."""
+
+    def __init__(self, limite_tokens: int = 4000, usar_count_tokens: bool = True):
+        self.limite_tokens = limite_tokens
+        self.usar_count_tokens = usar_count_tokens
+
+    def contar_tokens(self, agente, texto: str) -> int:
+        """
+        Conta os tokens do texto. Usa a estimativa local e só confirma com
+        `count_tokens` do modelo quando o texto está perto do limite.
+        """
+        estimativa = estimar_tokens(texto)
+        if not self.usar_count_tokens or estimativa < 0.8 * self.limite_tokens:
+            return estimativa
+        try:
+            return agente.model.count_tokens(texto).total_tokens
+        except Exception:
+            return estimativa
+
+    def ajustar(self, nome_etapa: str, contexto: Optional[str], agente, compactador, reaproveitar: bool = True) -> tuple:
+        """
+        Retorna (contexto, tokens_originais, tokens_finais). Se o contexto couber
+        no orçamento, ele é devolvido intacto; senão, é compactado. Com
+        `reaproveitar=False` a compactação não vem do cache de respostas.
+        """
+        if not contexto:
+            return contexto, 0, 0
+        tokens = self.contar_tokens(agente, contexto)
+        if tokens <= self.limite_tokens:
+            return contexto, tokens, tokens
+        print(f"🗜️ Contexto da etapa '{nome_etapa}' tem ~{tokens} tokens (limite {self.limite_tokens}). Compactando...")
+        compactado = compactador.executar(
+            tarefa=f"Compacte este contexto para no máximo {self.limite_tokens // 2} tokens.", contexto=contexto,
+            reaproveitar=reaproveitar,
+        )
+        return compactado, tokens, estimar_tokens(compactado)
+
+    async def ajustar_async(self, nome_etapa: str, contexto: Optional[str], agente, compactador,
+                            reaproveitar: bool = True) -> tuple:
+        """Versão assíncrona de ajustar, para a linha de montagem em asyncio."""
+        if not contexto:
+            return contexto, 0, 0
+        tokens = estimar_tokens(contexto)
+        if self.usar_count_tokens and tokens >= 0.8 * self.limite_tokens:
+            try:
+                tokens = (await agente.model.count_tokens_async(contexto)).total_tokens
+            except Exception:
+                pass
+        if tokens <= self.limite_tokens:
+            return contexto, tokens, tokens
+        print(f"🗜️ Contexto da etapa '{nome_etapa}' tem ~{tokens} tokens (limite {self.limite_tokens}). Compactando...")
+        compactado = await compactador.executar_async(
+            tarefa=f"Compacte este contexto para no máximo {self.limite_tokens // 2} tokens.", contexto=contexto,
+            reaproveitar=reaproveitar,
+        )
+        return compactado, tokens, estimar_tokens(compactado)
+
+
+def criar_orcamento_padrao() -> Optional[OrcamentoContexto]:
+    """Cria o orçamento a partir do ambiente. CONTEXTO_LIMITE_TOKENS=0 desliga a compactação."""
+    limite = int(os.getenv("CONTEXTO_LIMITE_TOKENS", "4000"))
+    return OrcamentoContexto(limite_tokens=limite) if limite > 0 else None
@@ -0,0 +1,180 @@
+# ==============================================================================
+# FILA DE JOBS PARA GERAÇÃO DE ATIVIDADES
+# DESCRIÇÃO: As requisições só enfileiram o trabalho e devolvem um id; um pool
+#            de workers em segundo plano roda a linha de montagem de agentes.
+#            O estado de cada job (status, progresso por etapa, resultado) fica
+#            num SQLite local, para que qualquer worker web consiga consultá-lo.
+#            Cada processo registra um sinal de vida; jobs de um processo que
+#            parou (reinício, deploy) são marcados como erro, e jobs antigos
+#            são apagados depois do prazo de retenção.
+# ==============================================================================
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+# Status possíveis de um job.
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+ERRO_ABANDONADO = "Job interrompido: o processo que o executava parou (reinício ou deploy). Envie o pedido de novo."
+
+
+class FilaJobs:
+    """Fila de jobs com pool de workers em processo e estado persistido em SQLite."""
+
+    def __init__(
+        self,
+        processar: Callable[[dict, Callable[[str, str], None]], dict],
+        caminho_db: str,
+        max_workers: int = 4,
+        intervalo_sinal: float = 30.0,
+        retencao_segundos: float = 7 * 24 * 3600,
+    ):
+        """
+        `processar(dados, reportar)` roda o job e devolve o resultado (um dict serializável).
+        `reportar(etapa, status)` pode ser chamado durante o processamento para registrar o progresso.
+        A cada `intervalo_sinal` segundos o processo renova seu sinal de vida; jobs
+        concluídos ou com erro há mais de `retencao_segundos` são apagados.
+        """
+        self.processar = processar
+        self.caminho_db = caminho_db
+        self.intervalo_sinal = intervalo_sinal
+        self.retencao_segundos = retencao_segundos
+        self.instancia = uuid.uuid4().hex
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        with self._conectar() as conexao:
+            conexao.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    dados TEXT NOT NULL,
+                    progresso TEXT NOT NULL DEFAULT '{}',
+                    resultado TEXT,
+                    erro TEXT,
+                    criado_em REAL NOT NULL,
+                    atualizado_em REAL NOT NULL
+                )"""
+            )
+            colunas = {linha[1] for linha in conexao.execute("PRAGMA table_info(jobs)")}
+            if "dono" not in colunas:
+                conexao.execute("ALTER TABLE jobs ADD COLUMN dono TEXT")
+            conexao.execute("CREATE TABLE IF NOT EXISTS instancias (id TEXT PRIMARY KEY, visto_em REAL NOT NULL)")
+        self._renovar_sinal()
+        self.recuperar_abandonados()
+        self.limpar_antigos()
+        threading.Thread(target=self._manter, name="fila-sinal", daemon=True).start()
+
+    def _conectar(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.caminho_db, timeout=30)
+
+    def _atualizar(self, job_id: str, **campos) -> None:
+        campos["atualizado_em"] = time.time()
+        colunas = ", ".join(f"{nome} = ?" for nome in campos)
+        with self._conectar() as conexao:
+            conexao.execute(f"UPDATE jobs SET {colunas} WHERE id = ?", (*campos.values(), job_id))
+
+    def _renovar_sinal(self) -> None:
+        with self._conectar() as conexao:
+            conexao.execute("INSERT OR REPLACE INTO instancias (id, visto_em) VALUES (?, ?)", (self.instancia, time.time()))
+
+    def _manter(self) -> None:
+        while not self._parar.wait(self.intervalo_sinal):
+            try:
+                self._renovar_sinal()
+                self.recuperar_abandonados()
+                self.limpar_antigos()
+            except sqlite3.Error as e:
+                print(f"⚠️ Fila de jobs: falha na manutenção ({e}).")
+
+    def recuperar_abandonados(self) -> int:
+        """Marca como erro os jobs pendentes ou em execução de processos sem sinal de vida recente."""
+        limite = time.time() - 3 * self.intervalo_sinal
+        with self._conectar() as conexao:
+            conexao.execute("DELETE FROM instancias WHERE visto_em < ?", (limite,))
+            cursor = conexao.execute(
+                """UPDATE jobs SET status = ?, erro = ?, atualizado_em = ?
+                   WHERE status IN (?, ?) AND (dono IS NULL OR dono NOT IN (SELECT id FROM instancias))""",
+                (ERRO, ERRO_ABANDONADO, time.time(), PENDENTE, EXECUTANDO),
+            )
+        if cursor.rowcount:
+            print(f"🧯 Fila de jobs: {cursor.rowcount} jobs abandonados por um processo parado marcados como erro.")
+        return cursor.rowcount
+
+    def limpar_antigos(self) -> int:
+        """Apaga os jobs finalizados há mais tempo que o prazo de retenção."""
+        with self._conectar() as conexao:
+            cursor = conexao.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND atualizado_em < ?",
+                (CONCLUIDO, ERRO, time.time() - self.retencao_segundos),
+            )
+        return cursor.rowcount
+
+    def enfileirar(self, dados: dict) -> str:
+        """Registra um novo job e o entrega ao pool de workers. Retorna o id do job."""
+        job_id = uuid.uuid4().hex
+        agora = time.time()
+        with self._conectar() as conexao:
+            conexao.execute(
+                "INSERT INTO jobs (id, status, dados, criado_em, atualizado_em, dono) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, PENDENTE, json.dumps(dados, ensure_ascii=False), agora, agora, self.instancia),
+            )
+        self._executor.submit(self._rodar, job_id, dados)
+        return job_id
+
+    def _rodar(self, job_id: str, dados: dict) -> None:
+        self._atualizar(job_id, status=EXECUTANDO)
+        progresso = {}
+
+        def reportar(etapa: str, status: str) -> None:
+            with self._lock:
+                progresso[etapa] = status
+                instantaneo = json.dumps(progresso, ensure_ascii=False)
+            self._atualizar(job_id, progresso=instantaneo)
+
+        try:
+            resultado = self.processar(dados, reportar)
+            self._atualizar(job_id, status=CONCLUIDO, resultado=json.dumps(resultado, ensure_ascii=False))
+        except Exception as e:
+            print(f"❌ Job {job_id} falhou: {e}")
+            self._atualizar(job_id, status=ERRO, erro=str(e))
+
+    def obter(self, job_id: str) -> Optional[dict]:
+        """Retorna o estado atual do job, ou None se ele não existir."""
+        with self._conectar() as conexao:
+            conexao.row_factory = sqlite3.Row
+            linha = conexao.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if linha is None:
+            return None
+        return {
+            "id": linha["id"],
+            "status": linha["status"],
+            "dados": json.loads(linha["dados"]),
+            "progresso": json.loads(linha["progresso"]),
+            "resultado": json.loads(linha["resultado"]) if linha["resultado"] else None,
+            "erro": linha["erro"],
+            "criado_em": linha["criado_em"],
+            "atualizado_em": linha["atualizado_em"],
+        }
+
+    def desligar(self, aguardar: bool = True) -> None:
+        self._parar.set()
+        self._executor.shutdown(wait=aguardar)
+
+
+def criar_fila_padrao(processar: Callable, max_workers: Optional[int] = None) -> FilaJobs:
+    """Cria a fila usando as configurações das variáveis de ambiente."""
+    return FilaJobs(
+        processar,
+        caminho_db=os.getenv("FILA_JOBS_DB", "jobs.sqlite3"),
+        max_workers=max_workers or int(os.getenv("FILA_JOBS_WORKERS", "4")),
+        retencao_segundos=float(os.getenv("FILA_JOBS_RETENCAO_DIAS", "7")) * 24 * 3600,
+    )
@@ -0,0 +1,226 @@
+# ==============================================================================
+# LIMITADOR DE TAXA E RETENTATIVAS PARA AS CHAMADAS AO MODELO
+# DESCRIÇÃO: Todos os agentes passam por um agendador compartilhado com dois
+#            baldes de fichas (requisições por minuto e tokens por minuto).
+#            Erros de cota ou transitórios são repetidos com backoff
+#            exponencial com jitter; os demais falham imediatamente.
+#            A taxa é adaptativa: um 429 esvazia o balde de requisições e
+#            reduz a taxa pela metade para todos os chamadores; cada sucesso
+#            devolve aos poucos a taxa configurada.
+# ==============================================================================
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+from google.api_core import exceptions as google_exceptions
+
+from metricas import retentativas
+
+# Erros que indicam cota estourada: o limitador inteiro desacelera.
+ERROS_COTA = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+
+# Erros que valem uma nova tentativa: cota estourada (429) e falhas temporárias do servidor.
+ERROS_RECUPERAVEIS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa barata de tokens (~4 caracteres por token), usada antes da chamada."""
+    return max(1, len(texto) // 4)
+
+
+class BaldeDeFichas:
+    """Balde de fichas clássico: enche a `capacidade` por minuto, de forma contínua."""
+
+    def __init__(self, capacidade_por_minuto: float):
+        self.capacidade = float(capacidade_por_minuto)
+        self.taxa_por_segundo = self.capacidade / 60.0
+        self.fator_taxa = 1.0
+        self.fichas = self.capacidade
+        self.ultima_recarga = time.monotonic()
+
+    def _recarregar(self) -> None:
+        agora = time.monotonic()
+        self.fichas = min(self.capacidade, self.fichas + (agora - self.ultima_recarga) * self.taxa_por_segundo)
+        self.ultima_recarga = agora
+
+    def espera_necessaria(self, quantidade: float) -> float:
+        """Quantos segundos faltam para haver `quantidade` fichas (0 se já há)."""
+        self._recarregar()
+        # Um pedido maior que a capacidade nunca caberia; nesse caso espera o balde encher.
+        quantidade = min(quantidade, self.capacidade)
+        if self.fichas >= quantidade:
+            return 0.0
+        return (quantidade - self.fichas) / self.taxa_por_segundo
+
+    def fichas_disponiveis(self) -> float:
+        self._recarregar()
+        return self.fichas
+
+    def ajustar_taxa(self, fator: float) -> None:
+        """Passa a encher a uma fração `fator` da taxa configurada."""
+        self._recarregar()
+        self.fator_taxa = fator
+        self.taxa_por_segundo = self.capacidade / 60.0 * fator
+
+    def esvaziar(self) -> None:
+        self._recarregar()
+        self.fichas = min(self.fichas, 0.0)
+
+    def consumir(self, quantidade: float) -> None:
+        self._recarregar()
+        # Pode ficar negativo quando o uso real supera a estimativa: a dívida atrasa os próximos.
+        self.fichas -= quantidade
+
+
+class LimitadorTaxa:
+    """Agendador compartilhado: respeita RPM/TPM e repete chamadas com backoff."""
+
+    def __init__(
+        self,
+        requisicoes_por_minuto: float = 15,
+        tokens_por_minuto: float = 1_000_000,
+        max_tentativas: int = 5,
+        espera_base: float = 2.0,
+        espera_maxima: float = 60.0,
+        fator_minimo: float = 0.1,
+        passo_recuperacao: float = 0.05,
+    ):
+        self.requisicoes = BaldeDeFichas(requisicoes_por_minuto)
+        self.tokens = BaldeDeFichas(tokens_por_minuto)
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.fator_minimo = fator_minimo
+        self.passo_recuperacao = passo_recuperacao
+        self._condicao = threading.Condition()
+        self.metricas = {"chamadas": 0, "retentativas": 0, "falhas_definitivas": 0, "segundos_em_espera": 0.0}
+
+    def adquirir(self, tokens_estimados: int) -> None:
+        """Bloqueia até haver cota para uma requisição com `tokens_estimados` tokens."""
+        with self._condicao:
+            while True:
+                espera = max(self.requisicoes.espera_necessaria(1), self.tokens.espera_necessaria(tokens_estimados))
+                if espera <= 0:
+                    self.requisicoes.consumir(1)
+                    self.tokens.consumir(tokens_estimados)
+                    self.metricas["chamadas"] += 1
+                    return
+                self.metricas["segundos_em_espera"] += espera
+                self._condicao.wait(timeout=espera)
+
+    async def adquirir_async(self, tokens_estimados: int) -> None:
+        """Como adquirir, mas espera com asyncio.sleep: aguardar a cota não ocupa uma thread."""
+        while True:
+            with self._condicao:
+                espera = max(self.requisicoes.espera_necessaria(1), self.tokens.espera_necessaria(tokens_estimados))
+                if espera <= 0:
+                    self.requisicoes.consumir(1)
+                    self.tokens.consumir(tokens_estimados)
+                    self.metricas["chamadas"] += 1
+                    return
+                self.metricas["segundos_em_espera"] += espera
+            await asyncio.sleep(espera)
+
+    def folga(self) -> float:
+        """Quantas requisições cabem agora no balde de RPM, sem consumir nenhuma."""
+        with self._condicao:
+            return self.requisicoes.fichas_disponiveis()
+
+    def registrar_uso(self, tokens_estimados: int, tokens_reais: Optional[int]) -> None:
+        """Corrige o balde de tokens com o uso real informado pela API."""
+        if tokens_reais is None:
+            return
+        with self._condicao:
+            self.tokens.consumir(tokens_reais - tokens_estimados)
+
+    def calcular_espera(self, tentativa: int) -> float:
+        """Backoff exponencial com jitter total: aleatório entre 0 e base * 2^tentativa."""
+        return random.uniform(0, min(self.espera_maxima, self.espera_base * (2 ** tentativa)))
+
+    def executar(self, funcao: Callable[[], object], tokens_estimados: int, descricao: str = "chamada"):
+        """
+        Executa `funcao()` dentro da cota, repetindo em erros recuperáveis.
+        Erros não recuperáveis (ou o esgotamento das tentativas) são propagados.
+        """
+        for tentativa in range(self.max_tentativas):
+            self.adquirir(tokens_estimados)
+            try:
+                resultado = funcao()
+            except ERROS_RECUPERAVEIS as e:
+                time.sleep(self._preparar_retentativa(e, tentativa, descricao))
+                continue
+            except Exception:
+                with self._condicao:
+                    self.metricas["falhas_definitivas"] += 1
+                raise
+            self._recuperar_taxa()
+            return resultado
+
+    async def executar_async(self, funcao: Callable[[], Awaitable], tokens_estimados: int, descricao: str = "chamada"):
+        """Versão assíncrona de executar: `funcao()` devolve uma corrotina, e as esperas não bloqueiam o loop."""
+        for tentativa in range(self.max_tentativas):
+            await self.adquirir_async(tokens_estimados)
+            try:
+                resultado = await funcao()
+            except ERROS_RECUPERAVEIS as e:
+                await asyncio.sleep(self._preparar_retentativa(e, tentativa, descricao))
+                continue
+            except Exception:
+                with self._condicao:
+                    self.metricas["falhas_definitivas"] += 1
+                raise
+            self._recuperar_taxa()
+            return resultado
+
+    def _preparar_retentativa(self, erro: Exception, tentativa: int, descricao: str) -> float:
+        """Registra a falha recuperável e devolve quanto esperar. Na última tentativa, propaga o erro."""
+        if isinstance(erro, ERROS_COTA):
+            self._reduzir_taxa()
+        if tentativa == self.max_tentativas - 1:
+            with self._condicao:
+                self.metricas["falhas_definitivas"] += 1
+            raise erro
+        espera = self.calcular_espera(tentativa)
+        with self._condicao:
+            self.metricas["retentativas"] += 1
+        retentativas.inc(erro=type(erro).__name__)
+        print(f"🔁 {descricao}: erro temporário ({type(erro).__name__}). Nova tentativa em {espera:.1f}s...")
+        return espera
+
+    def _reduzir_taxa(self) -> None:
+        """Cota estourada: esvazia o balde e corta a taxa pela metade para todos os chamadores."""
+        with self._condicao:
+            fator = max(self.fator_minimo, self.requisicoes.fator_taxa / 2)
+            self.requisicoes.ajustar_taxa(fator)
+            self.requisicoes.esvaziar()
+        print(f"🐢 Limitador: cota estourada, taxa reduzida para {fator:.0%} do limite configurado.")
+
+    def _recuperar_taxa(self) -> None:
+        """Cada chamada bem-sucedida devolve um pouco da taxa configurada."""
+        with self._condicao:
+            if self.requisicoes.fator_taxa < 1.0:
+                self.requisicoes.ajustar_taxa(min(1.0, self.requisicoes.fator_taxa + self.passo_recuperacao))
+
+    def estatisticas(self) -> dict:
+        with self._condicao:
+            return {**self.metricas, "fator_taxa": self.requisicoes.fator_taxa}
+
+
+# --- Limitador compartilhado por todos os agentes do processo ---
+limitador_padrao = LimitadorTaxa(
+    requisicoes_por_minuto=float(os.getenv("LIMITE_RPM", "15")),
+    tokens_por_minuto=float(os.getenv("LIMITE_TPM", "1000000")),
+    max_tentativas=int(os.getenv("LIMITE_MAX_TENTATIVAS", "5")),
+    espera_base=float(os.getenv("LIMITE_ESPERA_BASE", "2")),
+)
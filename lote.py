@@ -0,0 +1,101 @@
+# ==============================================================================
+# GERAÇÃO EM LOTE
+# DESCRIÇÃO: Gera atividades para uma lista de URLs com concorrência limitada.
+#            Cada atividade é gravada no arquivo de saída (JSONL) assim que
+#            termina, e URLs que já estão no arquivo são puladas, para que um
+#            lote interrompido possa ser retomado de onde parou.
+# ==============================================================================
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, List, Optional
+
+from urls import normalizar_url
+
+
+def ler_urls(caminho: str) -> List[str]:
+    """
+    Lê as URLs de um arquivo. Aceita JSONL (uma linha {"url": ...} por atividade)
+    ou texto simples (uma URL por linha). Linhas vazias e comentários (#) são ignorados.
+    """
+    urls = []
+    with open(caminho, encoding="utf-8") as arquivo:
+        for linha in arquivo:
+            linha = linha.strip()
+            if not linha or linha.startswith("#"):
+                continue
+            urls.append(json.loads(linha)["url"] if linha.startswith("{") else linha)
+    return urls
+
+
+def urls_concluidas(caminho_saida: str) -> set:
+    """URLs (normalizadas) que já têm uma atividade gerada com sucesso no arquivo de saída."""
+    concluidas = set()
+    if not os.path.exists(caminho_saida):
+        return concluidas
+    with open(caminho_saida, encoding="utf-8") as arquivo:
+        for linha in arquivo:
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                continue  # Linha truncada por uma queda no meio da gravação.
+            if "erro" not in registro:
+                concluidas.add(normalizar_url(registro["url"]))
+    return concluidas
+
+
+def processar_lote(
+    urls: Iterable[str],
+    gerar: Callable[[str], dict],
+    caminho_saida: str,
+    max_paralelo: int = 2,
+    ao_concluir: Optional[Callable[[str, dict], None]] = None,
+) -> dict:
+    """
+    Roda `gerar(url)` para cada URL pendente, com no máximo `max_paralelo` ao mesmo tempo.
+
+    Cada resultado (ou erro) vira uma linha em `caminho_saida`. Retorna um resumo
+    com as contagens e a vazão em atividades por minuto.
+    """
+    ja_feitas = urls_concluidas(caminho_saida)
+    pendentes, vistas, puladas = [], set(), 0
+    for url in urls:
+        url = normalizar_url(url)
+        if not url or url in vistas:
+            continue
+        vistas.add(url)
+        if url in ja_feitas:
+            puladas += 1
+        else:
+            pendentes.append(url)
+    print(f"📦 Lote: {len(pendentes)} URLs pendentes ({puladas} já concluídas serão puladas).")
+
+    resumo = {"puladas": puladas, "concluidas": 0, "erros": 0}
+    inicio = time.perf_counter()
+
+    def rodar(url: str) -> dict:
+        try:
+            return {"url": url, **gerar(url)}
+        except Exception as e:
+            return {"url": url, "erro": str(e)}
+
+    with open(caminho_saida, "a", encoding="utf-8") as saida, ThreadPoolExecutor(max_workers=max_paralelo) as executor:
+        futuros = [executor.submit(rodar, url) for url in pendentes]
+        for futuro in as_completed(futuros):
+            registro = futuro.result()
+            # Só a thread principal grava: cada linha vai inteira para o disco antes da próxima.
+            saida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            saida.flush()
+            resumo["erros" if "erro" in registro else "concluidas"] += 1
+            feitas = resumo["concluidas"] + resumo["erros"]
+            print(f"📦 [{feitas}/{len(pendentes)}] {registro['url']}: {'❌ ' + registro['erro'] if 'erro' in registro else '✅'}")
+            if ao_concluir:
+                ao_concluir(registro["url"], registro)
+
+    duracao = time.perf_counter() - inicio
+    resumo["segundos"] = duracao
+    resumo["atividades_por_minuto"] = resumo["concluidas"] / (duracao / 60) if duracao > 0 else 0.0
+    print(f"📦 Lote concluído: {resumo['concluidas']} atividades, {resumo['erros']} erros, "
+          f"{resumo['atividades_por_minuto']:.2f} atividades/min.")
+    return resumo
@@ -0,0 +1,219 @@
+# ==============================================================================
+# MÉTRICAS NO FORMATO PROMETHEUS
+# DESCRIÇÃO: Contadores, medidores e histogramas simples, seguros entre
+#            threads, exportados no formato de texto do Prometheus pela rota
+#            /metrics. Também guarda a linha do tempo das últimas execuções
+#            da linha de montagem (traces), para ver qual agente domina o
+#            caminho crítico.
+# ==============================================================================
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Sequence, Tuple
+
+BUCKETS_LATENCIA = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, float("inf"))
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_rotulos(nomes: Sequence[str], valores: Tuple[str, ...], extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatar_numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+        self._valores: Dict[Tuple[str, ...], object] = {}
+
+    def _chave(self, rotulos: dict) -> Tuple[str, ...]:
+        return tuple(str(rotulos.get(nome, "")) for nome in self.rotulos)
+
+    def _linhas(self) -> List[str]:
+        raise NotImplementedError
+
+    def exportar(self) -> str:
+        cabecalho = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        return "\n".join(cabecalho + self._linhas())
+
+
+class Contador(_Metrica):
+    """Valor que só cresce (ex: total de chamadas)."""
+    tipo = "counter"
+
+    def inc(self, valor: float = 1, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def valor(self, **rotulos) -> float:
+        with self._lock:
+            return self._valores.get(self._chave(rotulos), 0)
+
+    def _linhas(self) -> List[str]:
+        with self._lock:
+            itens = list(self._valores.items())
+        return [f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(v)}" for chave, v in itens]
+
+
+class Medidor(Contador):
+    """Valor que sobe e desce (ex: requisições em andamento)."""
+    tipo = "gauge"
+
+    def dec(self, valor: float = 1, **rotulos) -> None:
+        self.inc(-valor, **rotulos)
+
+    def definir(self, valor: float, **rotulos) -> None:
+        with self._lock:
+            self._valores[self._chave(rotulos)] = valor
+
+
+class MedidorCalculado(_Metrica):
+    """Medidor sem rótulos cujo valor é calculado no momento da coleta."""
+    tipo = "gauge"
+
+    def __init__(self, nome: str, ajuda: str, funcao: Callable[[], float]):
+        super().__init__(nome, ajuda)
+        self.funcao = funcao
+
+    def _linhas(self) -> List[str]:
+        return [f"{self.nome} {_formatar_numero(self.funcao())}"]
+
+
+class ContadorCalculado(MedidorCalculado):
+    """Contador sem rótulos cujo valor (sempre crescente) é lido de outra estatística na coleta."""
+    tipo = "counter"
+
+
+class Histograma(_Metrica):
+    """Distribuição de valores em faixas cumulativas (ex: latência)."""
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_LATENCIA):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = tuple(sorted(buckets))
+        if self.buckets[-1] != float("inf"):
+            self.buckets += (float("inf"),)
+
+    def observar(self, valor: float, **rotulos) -> None:
+        chave = self._chave(rotulos)
+        with self._lock:
+            contagens, soma = self._valores.get(chave, ([0] * len(self.buckets), 0.0))
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    contagens[i] += 1
+            self._valores[chave] = (contagens, soma + valor)
+
+    def _linhas(self) -> List[str]:
+        linhas = []
+        with self._lock:
+            itens = [(chave, (list(contagens), soma)) for chave, (contagens, soma) in self._valores.items()]
+        for chave, (contagens, soma) in itens:
+            for limite, contagem in zip(self.buckets, contagens):
+                rotulos = _formatar_rotulos(self.rotulos, chave, f'le="{_formatar_numero(limite)}"')
+                linhas.append(f"{self.nome}_bucket{rotulos} {contagem}")
+            linhas.append(f"{self.nome}_sum{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(soma)}")
+            linhas.append(f"{self.nome}_count{_formatar_rotulos(self.rotulos, chave)} {contagens[-1]}")
+        return linhas
+
+
+class RegistroMetricas:
+    """Coleção de métricas exportadas juntas."""
+
+    def __init__(self):
+        self._metricas: List[_Metrica] = []
+        self._lock = threading.Lock()
+
+    def _adicionar(self, metrica):
+        with self._lock:
+            self._metricas.append(metrica)
+        return metrica
+
+    def contador(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Contador:
+        return self._adicionar(Contador(nome, ajuda, rotulos))
+
+    def medidor(self, nome: str, ajuda: str, rotulos: Sequence[str] = ()) -> Medidor:
+        return self._adicionar(Medidor(nome, ajuda, rotulos))
+
+    def medidor_calculado(self, nome: str, ajuda: str, funcao: Callable[[], float]) -> MedidorCalculado:
+        return self._adicionar(MedidorCalculado(nome, ajuda, funcao))
+
+    def contador_calculado(self, nome: str, ajuda: str, funcao: Callable[[], float]) -> ContadorCalculado:
+        return self._adicionar(ContadorCalculado(nome, ajuda, funcao))
+
+    def histograma(self, nome: str, ajuda: str, rotulos: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_LATENCIA) -> Histograma:
+        return self._adicionar(Histograma(nome, ajuda, rotulos, buckets))
+
+    def exportar(self) -> str:
+        with self._lock:
+            metricas = list(self._metricas)
+        return "\n".join(m.exportar() for m in metricas) + "\n"
+
+
+class HistoricoTraces:
+    """Guarda a linha do tempo das últimas execuções da linha de montagem."""
+
+    def __init__(self, tamanho: int = 50):
+        self._traces = deque(maxlen=tamanho)
+        self._lock = threading.Lock()
+
+    def registrar(self, url: str, execucao) -> None:
+        with self._lock:
+            self._traces.append({
+                "url": url,
+                "registrado_em": time.time(),
+                "duracao_total": execucao.duracao_total,
+                "caminho_critico": execucao.caminho_critico,
+                "etapas": execucao.tempos,
+            })
+
+    def listar(self) -> list:
+        with self._lock:
+            return list(reversed(self._traces))
+
+
+# ==============================================================================
+# MÉTRICAS DA LINHA DE MONTAGEM (compartilhadas pelo processo)
+# ==============================================================================
+registro_metricas = RegistroMetricas()
+
+latencia_agente = registro_metricas.histograma(
+    "atividades_agente_latencia_segundos", "Latência de Agente.executar por agente.", ("agente",))
+chamadas_agente = registro_metricas.contador(
+    "atividades_agente_chamadas_total", "Chamadas a Agente.executar por origem da resposta (modelo, cache, compartilhada).", ("agente", "origem"))
+erros_agente = registro_metricas.contador(
+    "atividades_agente_erros_total", "Erros em Agente.executar por classe de erro.", ("agente", "erro"))
+tokens_prompt = registro_metricas.contador(
+    "atividades_agente_tokens_prompt_total", "Tokens de prompt enviados ao modelo.", ("agente",))
+tokens_resposta = registro_metricas.contador(
+    "atividades_agente_tokens_resposta_total", "Tokens de resposta gerados pelo modelo.", ("agente",))
+agentes_em_andamento = registro_metricas.medidor(
+    "atividades_agente_em_andamento", "Chamadas de agente em andamento.", ("agente",))
+retentativas = registro_metricas.contador(
+    "atividades_modelo_retentativas_total", "Novas tentativas de chamadas ao modelo por classe de erro.", ("erro",))
+latencia_etapa = registro_metricas.histograma(
+    "atividades_etapa_latencia_segundos", "Latência de cada etapa da linha de montagem.", ("etapa",))
+latencia_pipeline = registro_metricas.histograma(
+    "atividades_pipeline_latencia_segundos", "Latência ponta a ponta da linha de montagem, por reaproveitamento de etapas (nenhum, parcial, total).",
+    ("reaproveitamento",))
+pipelines_em_andamento = registro_metricas.medidor(
+    "atividades_pipeline_em_andamento", "Linhas de montagem em andamento.")
+erros_pipeline = registro_metricas.contador(
+    "atividades_pipeline_erros_total", "Linhas de montagem interrompidas por erro.", ("erro",))
+
+historico_traces = HistoricoTraces()
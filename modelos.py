@@ -0,0 +1,132 @@
+# ==============================================================================
+# BACKENDS DE MODELO
+# DESCRIÇÃO: O Agente não cria o modelo diretamente: ele usa uma fábrica de
+#            modelos. Por padrão é o Gemini; com BACKEND_MODELO=falso entra um
+#            modelo local e determinístico, que simula latência, tokens e erros
+#            (inclusive 429) sem rede nem cota — usado nos benchmarks.
+# ==============================================================================
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+FabricaModelo = Callable[[str, str], object]
+
+
+def criar_modelo_gemini(model_name: str, system_instruction: str):
+    return genai.GenerativeModel(model_name=model_name, system_instruction=system_instruction)
+
+
+class ModeloFalso:
+    """
+    Imitação local de `genai.GenerativeModel` para testes e benchmarks.
+
+    A resposta depende só do prompt (mesmo prompt, mesmo texto). Latência,
+    erros e 429 são sorteados por um gerador com semente fixa.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        system_instruction: str,
+        latencia_ms: float = 800,
+        jitter_ms: float = 200,
+        tokens_saida: int = 400,
+        taxa_erro: float = 0.0,
+        taxa_429: float = 0.0,
+        semente: int = 42,
+    ):
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_saida = tokens_saida
+        self.taxa_erro = taxa_erro
+        self.taxa_429 = taxa_429
+        self._aleatorio = random.Random(f"{semente}:{model_name}:{system_instruction}")
+        self._lock = threading.Lock()
+
+    def _sortear(self):
+        with self._lock:
+            latencia = max(0.0, self.latencia_ms + self._aleatorio.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            sorteio = self._aleatorio.random()
+        return latencia, sorteio
+
+    def _texto(self, prompt: str) -> str:
+        resumo = hashlib.sha256((self.system_instruction + prompt).encode("utf-8")).hexdigest()[:12]
+        # ~4 caracteres por token: "lorem " tem 6, então ~1,5 token por palavra.
+        palavras = max(1, int(self.tokens_saida / 1.5))
+        return f"[{self.model_name}:{resumo}] " + " ".join(["lorem"] * palavras)
+
+    def _resposta(self, prompt: str, texto: str):
+        entrada = len(self.system_instruction + prompt) // 4
+        saida = len(texto) // 4
+        uso = SimpleNamespace(prompt_token_count=entrada, candidates_token_count=saida, total_token_count=entrada + saida)
+        return SimpleNamespace(text=texto, usage_metadata=uso)
+
+    def _erro_sorteado(self, sorteio: float):
+        """O erro simulado para este sorteio (429 ou 503), ou None."""
+        if sorteio < self.taxa_429:
+            return google_exceptions.ResourceExhausted("429 Quota exceeded (modelo falso)")
+        if sorteio < self.taxa_429 + self.taxa_erro:
+            return google_exceptions.ServiceUnavailable("503 Service unavailable (modelo falso)")
+        return None
+
+    def generate_content(self, prompt: str, stream: bool = False):
+        latencia, sorteio = self._sortear()
+        erro = self._erro_sorteado(sorteio)
+        if erro is not None:
+            time.sleep(latencia * 0.1)
+            raise erro
+        texto = self._texto(prompt)
+        if not stream:
+            time.sleep(latencia)
+            return self._resposta(prompt, texto)
+
+        def pedacos():
+            partes = [texto[i:i + 200] for i in range(0, len(texto), 200)]
+            for parte in partes:
+                time.sleep(latencia / len(partes))
+                yield SimpleNamespace(text=parte)
+        return pedacos()
+
+    async def generate_content_async(self, prompt: str):
+        latencia, sorteio = self._sortear()
+        erro = self._erro_sorteado(sorteio)
+        if erro is not None:
+            await asyncio.sleep(latencia * 0.1)
+            raise erro
+        await asyncio.sleep(latencia)
+        return self._resposta(prompt, self._texto(prompt))
+
+    def count_tokens(self, texto: str):
+        return SimpleNamespace(total_tokens=max(1, len(texto) // 4))
+
+    async def count_tokens_async(self, texto: str):
+        return self.count_tokens(texto)
+
+
+def criar_fabrica_falsa(**opcoes) -> FabricaModelo:
+    """Fábrica de ModeloFalso com as mesmas opções para todos os agentes."""
+    return lambda model_name, system_instruction: ModeloFalso(model_name, system_instruction, **opcoes)
+
+
+def criar_fabrica_padrao() -> FabricaModelo:
+    """Escolhe o backend pela variável BACKEND_MODELO ('gemini' ou 'falso')."""
+    if os.getenv("BACKEND_MODELO", "gemini") != "falso":
+        return criar_modelo_gemini
+    return criar_fabrica_falsa(
+        latencia_ms=float(os.getenv("MODELO_FALSO_LATENCIA_MS", "800")),
+        jitter_ms=float(os.getenv("MODELO_FALSO_JITTER_MS", "200")),
+        tokens_saida=int(os.getenv("MODELO_FALSO_TOKENS_SAIDA", "400")),
+        taxa_erro=float(os.getenv("MODELO_FALSO_TAXA_ERRO", "0")),
+        taxa_429=float(os.getenv("MODELO_FALSO_TAXA_429", "0")),
+        semente=int(os.getenv("MODELO_FALSO_SEMENTE", "42")),
+    )
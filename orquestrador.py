@@ -0,0 +1,328 @@
+# ==============================================================================
+# ORQUESTRADOR EM GRAFO (DAG) PARA A LINHA DE MONTAGEM DE AGENTES
+# DESCRIÇÃO: Cada etapa declara de quais resultados depende. Etapas que não
+#            dependem umas das outras rodam em paralelo num pool de threads,
+#            e ao final é gerado um relatório de tempos com o caminho crítico.
+#            A versão assíncrona roda as etapas como tarefas do asyncio.
+# ==============================================================================
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from artefatos import ArmazemArtefatos, chave_artefato
+from contexto import NOME_COMPACTADOR, OrcamentoContexto
+from limitador import estimar_tokens
+from metricas import erros_pipeline, latencia_etapa, latencia_pipeline, pipelines_em_andamento
+
+Texto = Union[str, Callable[[Dict[str, str]], str]]
+
+
+@dataclass
+class Etapa:
+    """Uma etapa do pipeline: qual agente chamar, com qual tarefa e de quais etapas depende."""
+    nome: str
+    agente: str
+    tarefa: Texto
+    dependencias: tuple = ()
+    contexto: Optional[Texto] = None
+    # Etapas que precisam do texto integral (ex: o revisor final) não têm o contexto compactado.
+    compactavel: bool = True
+
+    def montar(self, resultados: Dict[str, str]):
+        """Resolve a tarefa e o contexto a partir dos resultados já disponíveis."""
+        tarefa = self.tarefa(resultados) if callable(self.tarefa) else self.tarefa
+        contexto = self.contexto
+        if callable(contexto):
+            contexto = contexto(resultados)
+        elif contexto is None and len(self.dependencias) == 1:
+            # Caso mais comum: o contexto é o resultado da única dependência.
+            contexto = resultados[self.dependencias[0]]
+        return tarefa, contexto
+
+
+@dataclass
+class ResultadoPipeline:
+    """Resultados de cada etapa e o relatório de tempos da execução."""
+    resultados: Dict[str, str]
+    tempos: Dict[str, dict] = field(default_factory=dict)
+    caminho_critico: List[str] = field(default_factory=list)
+    duracao_total: float = 0.0
+
+    def relatorio(self) -> str:
+        """Formata os tempos de cada etapa, marcando as que estão no caminho crítico."""
+        linhas = [f"⏱️ Tempo total: {self.duracao_total:.2f}s"]
+        for nome, t in sorted(self.tempos.items(), key=lambda item: item[1]["inicio"]):
+            marcador = "♻️" if t.get("reaproveitada") else "🔥" if nome in self.caminho_critico else "  "
+            linhas.append(
+                f"{marcador} {nome:<32} início {t['inicio']:>7.2f}s  fim {t['fim']:>7.2f}s  duração {t['duracao']:>7.2f}s"
+                f"  tokens entrada {t['tokens_entrada']:>6} / saída {t['tokens_saida']:>6}"
+            )
+        linhas.append("Caminho crítico: " + " → ".join(self.caminho_critico))
+        economizados = sum(t["tokens_contexto_original"] - t["tokens_contexto"] for t in self.tempos.values())
+        if economizados:
+            linhas.append(f"🗜️ Compactação de contexto economizou ~{economizados} tokens de entrada.")
+        reaproveitadas = [nome for nome, t in self.tempos.items() if t.get("reaproveitada")]
+        if reaproveitadas:
+            linhas.append(f"♻️ {len(reaproveitadas)} de {len(self.tempos)} etapas reaproveitadas da execução anterior: {', '.join(reaproveitadas)}")
+        return "\n".join(linhas)
+
+
+def validar_etapas(etapas: Iterable[Etapa], entradas: Iterable[str] = ()) -> None:
+    """Garante que as dependências existem e que o grafo não tem ciclos."""
+    etapas = list(etapas)
+    nomes = {e.nome for e in etapas} | set(entradas)
+    for etapa in etapas:
+        faltando = [d for d in etapa.dependencias if d not in nomes]
+        if faltando:
+            raise ValueError(f"Etapa '{etapa.nome}' depende de etapas inexistentes: {faltando}")
+
+    resolvidas = set(entradas)
+    pendentes = {e.nome: set(e.dependencias) for e in etapas}
+    while pendentes:
+        prontas = [n for n, deps in pendentes.items() if deps <= resolvidas]
+        if not prontas:
+            raise ValueError(f"Ciclo de dependências entre as etapas: {sorted(pendentes)}")
+        for nome in prontas:
+            resolvidas.add(nome)
+            del pendentes[nome]
+
+
+def executar_pipeline(
+    etapas: Iterable[Etapa],
+    agentes: Dict[str, object],
+    entradas: Optional[Dict[str, str]] = None,
+    max_paralelo: int = 4,
+    ao_concluir: Optional[Callable[[str, str], None]] = None,
+    orcamento: Optional[OrcamentoContexto] = None,
+    armazem: Optional[ArmazemArtefatos] = None,
+    reaproveitar: bool = True,
+    transmitir: Optional[str] = None,
+    ao_pedaco: Optional[Callable[[str, str], None]] = None,
+) -> ResultadoPipeline:
+    """
+    Executa as etapas respeitando as dependências e rodando em paralelo as independentes.
+
+    `entradas` são valores iniciais (ex: {"url": ...}) que as etapas podem usar como
+    dependência. `ao_concluir(nome, resultado)` é chamado assim que cada etapa termina.
+    Se alguma etapa levantar exceção, as etapas pendentes são canceladas e o erro é propagado.
+    Com um `orcamento`, contextos acima do limite são compactados pelo agente
+    NOME_COMPACTADOR (que precisa estar em `agentes`) antes de chegar à etapa.
+    Com um `armazem`, etapas cujas entradas e instrução de sistema não mudaram
+    reaproveitam o artefato da execução anterior em vez de chamar o agente.
+    Com `reaproveitar=False` (ex: o usuário pediu uma nova versão) nem o armazém nem
+    o cache de respostas são consultados, mas os resultados novos são gravados neles.
+    A etapa de nome `transmitir` (ex: o revisor final) chama o agente em streaming e
+    repassa cada pedaço a `ao_pedaco(nome, pedaco)` enquanto o modelo gera.
+    """
+    etapas = list(etapas)
+    entradas = dict(entradas or {})
+    validar_etapas(etapas, entradas)
+
+    resultados: Dict[str, str] = dict(entradas)
+    tempos: Dict[str, dict] = {}
+    pendentes = {e.nome: e for e in etapas}
+    inicio_pipeline = time.perf_counter()
+
+    def rodar(etapa: Etapa, tarefa: str, contexto: Optional[str]):
+        inicio = time.perf_counter() - inicio_pipeline
+        agente = agentes[etapa.agente]
+        chave = chave_artefato(etapa.nome, agente, tarefa, contexto) if armazem is not None else None
+        if chave is not None and reaproveitar:
+            artefato = armazem.obter(chave)
+            if artefato is not None:
+                return artefato, _medidas_reaproveitada(inicio, time.perf_counter() - inicio_pipeline)
+        tokens_originais = tokens_contexto = estimar_tokens(contexto) if contexto else 0
+        if orcamento is not None and etapa.compactavel:
+            contexto, tokens_originais, tokens_contexto = orcamento.ajustar(
+                etapa.nome, contexto, agente, agentes[NOME_COMPACTADOR], reaproveitar=reaproveitar
+            )
+        if etapa.nome == transmitir:
+            pedacos = []
+            for pedaco in agente.executar_stream(tarefa=tarefa, contexto=contexto, reaproveitar=reaproveitar):
+                pedacos.append(pedaco)
+                if ao_pedaco:
+                    ao_pedaco(etapa.nome, pedaco)
+            resultado = "".join(pedacos)
+        else:
+            resultado = agente.executar(tarefa=tarefa, contexto=contexto, reaproveitar=reaproveitar)
+        if chave is not None:
+            armazem.guardar(chave, etapa.nome, resultado)
+        fim = time.perf_counter() - inicio_pipeline
+        return resultado, _medidas(inicio, fim, tokens_originais, tokens_contexto, tarefa, resultado)
+
+    pipelines_em_andamento.inc()
+    try:
+        _executar_grafo(pendentes, resultados, tempos, rodar, max_paralelo, ao_concluir)
+    except Exception as e:
+        erros_pipeline.inc(erro=type(e).__name__)
+        raise
+    finally:
+        pipelines_em_andamento.dec()
+
+    return _finalizar(etapas, resultados, tempos, inicio_pipeline)
+
+
+async def executar_pipeline_async(
+    etapas: Iterable[Etapa],
+    agentes: Dict[str, object],
+    entradas: Optional[Dict[str, str]] = None,
+    max_paralelo: int = 4,
+    ao_concluir: Optional[Callable[[str, str], None]] = None,
+    orcamento: Optional[OrcamentoContexto] = None,
+    armazem: Optional[ArmazemArtefatos] = None,
+    reaproveitar: bool = True,
+) -> ResultadoPipeline:
+    """
+    Versão assíncrona de executar_pipeline: as etapas rodam como tarefas do asyncio
+    e os agentes são chamados com `executar_async`, sem ocupar threads. As leituras e
+    gravações no armazém (SQLite) rodam em threads, fora do loop.
+    Se a corrotina for cancelada (ex: o cliente desconectou), as etapas em
+    andamento são canceladas junto.
+    """
+    etapas = list(etapas)
+    entradas = dict(entradas or {})
+    validar_etapas(etapas, entradas)
+
+    resultados: Dict[str, str] = dict(entradas)
+    tempos: Dict[str, dict] = {}
+    pendentes = {e.nome: e for e in etapas}
+    inicio_pipeline = time.perf_counter()
+
+    async def rodar(etapa: Etapa, tarefa: str, contexto: Optional[str]):
+        inicio = time.perf_counter() - inicio_pipeline
+        agente = agentes[etapa.agente]
+        chave = chave_artefato(etapa.nome, agente, tarefa, contexto) if armazem is not None else None
+        if chave is not None and reaproveitar:
+            artefato = await asyncio.to_thread(armazem.obter, chave)
+            if artefato is not None:
+                return artefato, _medidas_reaproveitada(inicio, time.perf_counter() - inicio_pipeline)
+        tokens_originais = tokens_contexto = estimar_tokens(contexto) if contexto else 0
+        if orcamento is not None and etapa.compactavel:
+            contexto, tokens_originais, tokens_contexto = await orcamento.ajustar_async(
+                etapa.nome, contexto, agente, agentes[NOME_COMPACTADOR], reaproveitar=reaproveitar
+            )
+        resultado = await agente.executar_async(tarefa=tarefa, contexto=contexto, reaproveitar=reaproveitar)
+        if chave is not None:
+            await asyncio.to_thread(armazem.guardar, chave, etapa.nome, resultado)
+        fim = time.perf_counter() - inicio_pipeline
+        return resultado, _medidas(inicio, fim, tokens_originais, tokens_contexto, tarefa, resultado)
+
+    pipelines_em_andamento.inc()
+    try:
+        await _executar_grafo_async(pendentes, resultados, tempos, rodar, max_paralelo, ao_concluir)
+    except (Exception, asyncio.CancelledError) as e:
+        erros_pipeline.inc(erro=type(e).__name__)
+        raise
+    finally:
+        pipelines_em_andamento.dec()
+
+    return _finalizar(etapas, resultados, tempos, inicio_pipeline)
+
+
+def _medidas(inicio: float, fim: float, tokens_originais: int, tokens_contexto: int, tarefa: str, resultado: str) -> dict:
+    return {
+        "inicio": inicio,
+        "fim": fim,
+        "duracao": fim - inicio,
+        "reaproveitada": False,
+        "tokens_contexto_original": tokens_originais,
+        "tokens_contexto": tokens_contexto,
+        "tokens_entrada": tokens_contexto + estimar_tokens(tarefa),
+        "tokens_saida": estimar_tokens(resultado),
+    }
+
+
+def _medidas_reaproveitada(inicio: float, fim: float) -> dict:
+    return {
+        "inicio": inicio, "fim": fim, "duracao": fim - inicio, "reaproveitada": True,
+        "tokens_contexto_original": 0, "tokens_contexto": 0, "tokens_entrada": 0, "tokens_saida": 0,
+    }
+
+
+def _finalizar(etapas: List[Etapa], resultados, tempos, inicio_pipeline: float) -> ResultadoPipeline:
+    duracao_total = time.perf_counter() - inicio_pipeline
+    # Execuções com etapas reaproveitadas ficam separadas, para não puxar a latência real para baixo.
+    reaproveitadas = sum(1 for t in tempos.values() if t["reaproveitada"])
+    reaproveitamento = "nenhum" if not reaproveitadas else "total" if reaproveitadas == len(tempos) else "parcial"
+    latencia_pipeline.observar(duracao_total, reaproveitamento=reaproveitamento)
+    return ResultadoPipeline(
+        resultados=resultados,
+        tempos=tempos,
+        caminho_critico=_caminho_critico(etapas, tempos),
+        duracao_total=duracao_total,
+    )
+
+
+def _registrar_etapa(etapa: Etapa, resultado: str, medidas: dict, resultados, tempos, ao_concluir) -> None:
+    resultados[etapa.nome] = resultado
+    tempos[etapa.nome] = medidas
+    # Uma etapa reaproveitada não chamou o modelo: sua "latência" (~0 s) não entra no histograma.
+    if not medidas["reaproveitada"]:
+        latencia_etapa.observar(medidas["duracao"], etapa=etapa.nome)
+    if ao_concluir:
+        ao_concluir(etapa.nome, resultado)
+
+
+def _executar_grafo(pendentes, resultados, tempos, rodar, max_paralelo, ao_concluir) -> None:
+    """Laço principal: dispara as etapas prontas e recolhe as concluídas até acabar o grafo."""
+    em_execucao = {}
+    with ThreadPoolExecutor(max_workers=max_paralelo) as executor:
+        while pendentes or em_execucao:
+            prontas = [e for e in pendentes.values() if all(d in resultados for d in e.dependencias)]
+            for etapa in prontas:
+                del pendentes[etapa.nome]
+                tarefa, contexto = etapa.montar(resultados)
+                em_execucao[executor.submit(rodar, etapa, tarefa, contexto)] = etapa
+
+            concluidos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in concluidos:
+                etapa = em_execucao.pop(futuro)
+                try:
+                    resultado, medidas = futuro.result()
+                except Exception:
+                    for restante in em_execucao:
+                        restante.cancel()
+                    raise
+                _registrar_etapa(etapa, resultado, medidas, resultados, tempos, ao_concluir)
+
+
+async def _executar_grafo_async(pendentes, resultados, tempos, rodar, max_paralelo, ao_concluir) -> None:
+    """Igual a _executar_grafo, com tarefas do asyncio; no máximo `max_paralelo` etapas ao mesmo tempo."""
+    em_execucao = {}
+    try:
+        while pendentes or em_execucao:
+            prontas = [e for e in pendentes.values() if all(d in resultados for d in e.dependencias)]
+            for etapa in prontas[:max(0, max_paralelo - len(em_execucao))]:
+                del pendentes[etapa.nome]
+                tarefa, contexto = etapa.montar(resultados)
+                em_execucao[asyncio.ensure_future(rodar(etapa, tarefa, contexto))] = etapa
+
+            concluidas, _ = await asyncio.wait(em_execucao, return_when=asyncio.FIRST_COMPLETED)
+            for tarefa_asyncio in concluidas:
+                etapa = em_execucao.pop(tarefa_asyncio)
+                resultado, medidas = tarefa_asyncio.result()
+                _registrar_etapa(etapa, resultado, medidas, resultados, tempos, ao_concluir)
+    finally:
+        # Erro numa etapa ou cancelamento de fora: nenhuma etapa fica rodando sozinha.
+        for restante in em_execucao:
+            restante.cancel()
+        if em_execucao:
+            await asyncio.gather(*em_execucao, return_exceptions=True)
+
+
+def _caminho_critico(etapas: List[Etapa], tempos: Dict[str, dict]) -> List[str]:
+    """Reconstrói, de trás para frente, a cadeia de etapas que determinou o tempo total."""
+    if not tempos:
+        return []
+    por_nome = {e.nome: e for e in etapas}
+    atual = max(tempos, key=lambda nome: tempos[nome]["fim"])
+    caminho = [atual]
+    while True:
+        deps = [d for d in por_nome[atual].dependencias if d in tempos]
+        if not deps:
+            break
+        atual = max(deps, key=lambda nome: tempos[nome]["fim"])
+        caminho.append(atual)
+    return list(reversed(caminho))
@@ -0,0 +1,108 @@
+# ==============================================================================
+# RESERVA DE ATIVIDADES ALEATÓRIAS (PRÉ-GERAÇÃO ESPECULATIVA)
+# DESCRIÇÃO: No modo "aleatorio" o usuário não escolhe a URL, então a
+#            atividade pode ser gerada antes do pedido. Uma thread em segundo
+#            plano mantém uma reserva com algumas atividades prontas,
+#            gerando só quando o processo está ocioso e há folga no limite de
+#            taxa. O pedido aleatório retira uma atividade da reserva na hora
+#            e a reposição acontece em segundo plano.
+#
+#            A reserva é por processo: com vários workers do gunicorn, cada um
+#            mantém a sua. Ela só começa a ser abastecida quando o servidor
+#            chama iniciar(), não ao importar o módulo.
+# ==============================================================================
+import os
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+
+class ReservaAtividades:
+    """Reserva de atividades pré-geradas, reposta por uma thread quando há folga."""
+
+    def __init__(
+        self,
+        gerar: Callable[[], dict],
+        capacidade: int = 2,
+        ocioso: Callable[[], bool] = lambda: True,
+        intervalo: float = 5.0,
+        espera_apos_erro: float = 60.0,
+    ):
+        """
+        `gerar()` produz uma atividade aleatória completa. `ocioso()` diz se é um
+        bom momento para gerar (sem pedidos em andamento e com cota sobrando);
+        enquanto não for, a thread confere de novo a cada `intervalo` segundos.
+        """
+        self.gerar = gerar
+        self.capacidade = capacidade
+        self.ocioso = ocioso
+        self.intervalo = intervalo
+        self.espera_apos_erro = espera_apos_erro
+        self._atividades = deque()
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.metricas = {"acertos": 0, "falhas": 0, "geradas": 0, "erros": 0}
+
+    def iniciar(self) -> None:
+        """Liga a thread de reposição (uma vez só; chamadas seguintes não fazem nada)."""
+        with self._lock:
+            if self._thread is not None or self.capacidade <= 0:
+                return
+            self._thread = threading.Thread(target=self._repor, name="reserva-aleatoria", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        self._parar.set()
+        self._acordar.set()
+
+    def retirar(self) -> Optional[dict]:
+        """Retira a atividade mais antiga da reserva (None se estiver vazia) e pede a reposição."""
+        with self._lock:
+            atividade = self._atividades.popleft() if self._atividades else None
+            self.metricas["acertos" if atividade else "falhas"] += 1
+        self._acordar.set()
+        return atividade
+
+    def tamanho(self) -> int:
+        with self._lock:
+            return len(self._atividades)
+
+    def _repor(self) -> None:
+        while not self._parar.is_set():
+            if self.tamanho() < self.capacidade and self.ocioso():
+                try:
+                    atividade = self.gerar()
+                except Exception as e:
+                    with self._lock:
+                        self.metricas["erros"] += 1
+                    print(f"⚠️ Reserva aleatória: falha ao pré-gerar uma atividade ({e}). Nova tentativa em {self.espera_apos_erro:.0f}s.")
+                    self._parar.wait(self.espera_apos_erro)
+                    continue
+                with self._lock:
+                    self._atividades.append(atividade)
+                    self.metricas["geradas"] += 1
+                print(f"🎲 Reserva aleatória: {atividade['url']} pronta ({self.tamanho()}/{self.capacidade}).")
+                continue
+            self._acordar.wait(timeout=self.intervalo)
+            self._acordar.clear()
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            dados = dict(self.metricas)
+            dados["tamanho"] = len(self._atividades)
+        dados["capacidade"] = self.capacidade
+        pedidos = dados["acertos"] + dados["falhas"]
+        dados["taxa_acerto"] = dados["acertos"] / pedidos if pedidos else 0.0
+        return dados
+
+
+def criar_reserva_padrao(gerar: Callable[[], dict], ocioso: Callable[[], bool] = lambda: True) -> ReservaAtividades:
+    """Cria a reserva a partir do ambiente. RESERVA_ALEATORIA_TAMANHO=0 desliga a pré-geração."""
+    return ReservaAtividades(
+        gerar,
+        capacidade=int(os.getenv("RESERVA_ALEATORIA_TAMANHO", "2")),
+        ocioso=ocioso,
+        intervalo=float(os.getenv("RESERVA_ALEATORIA_INTERVALO", "5")),
+    )
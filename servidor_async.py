@@ -0,0 +1,176 @@
+# ==============================================================================
+# SERVIDOR ASSÍNCRONO (ASGI) DA LINHA DE MONTAGEM
+# DESCRIÇÃO: No app Flask, cada geração prende uma thread do worker enquanto
+#            espera o Gemini. Aqui a mesma linha de montagem roda em asyncio
+#            (Agente.executar_async): centenas de gerações cabem num único
+#            processo, e a geração é cancelada se o cliente desconectar.
+#            Os agentes, etapas, cache e artefatos são os mesmos do app.py.
+#
+# USO: uvicorn servidor_async:app --host 0.0.0.0 --port 5001
+#      POST /gerar-atividade/async  {"url": ..., "modo": ..., "extras": [...], "regenerar": false}
+#      Resposta em NDJSON, no mesmo formato de /gerar-atividade/stream.
+# ==============================================================================
+import asyncio
+import json
+
+from app import (
+    ARMAZEM_ARTEFATOS, ETAPAS_EXTRAS, ETAPAS_PIPELINE, ORCAMENTO_CONTEXTO, RESERVA_ALEATORIA, atividade_da_reserva,
+    atividade_do_acervo, evento_ndjson, eventos_atividade_pronta, meus_agentes, registrar_no_acervo, validar_extras,
+)
+from metricas import historico_traces
+from orquestrador import executar_pipeline_async
+from urls import normalizar_url
+
+
+async def resolver_url_inicial_async(data: dict):
+    """Igual a app.resolver_url_inicial, chamando o explorador de forma assíncrona."""
+    if data.get('modo', 'manual') == 'aleatorio':
+        url = await meus_agentes["Explorador Web Aleatório"].executar_async(tarefa="Escolha uma URL aleatória.")
+        print(f"\n🌐 URL escolhida pelo agente: {url}")
+        return url
+    return data.get('url')
+
+
+async def gerar_atividade_async(url: str, modo: str = 'manual', ao_concluir=None, extras=(), regenerar=False) -> dict:
+    """Versão assíncrona de app.gerar_atividade, com o mesmo resultado serializável."""
+    extras = tuple(sorted(set(extras)))
+    etapas = ETAPAS_PIPELINE + [ETAPAS_EXTRAS[nome] for nome in extras]
+    if not regenerar:
+        # Acervo, artefatos e cache ficam em SQLite: as consultas rodam em threads, fora do loop.
+        existente = await asyncio.to_thread(atividade_do_acervo, url, extras)
+        if existente is not None:
+            return existente
+    print(f"\n🚀 Orquestração (async) iniciada para a URL: {url}")
+    execucao = await executar_pipeline_async(
+        etapas, meus_agentes, entradas={"url": url}, orcamento=ORCAMENTO_CONTEXTO,
+        armazem=ARMAZEM_ARTEFATOS, ao_concluir=ao_concluir, reaproveitar=not regenerar,
+    )
+    print(execucao.relatorio())
+    print("✅ Orquestração (async) concluída com sucesso!")
+    historico_traces.registrar(url, execucao)
+    atividade_id = await asyncio.to_thread(registrar_no_acervo, url, modo, execucao, etapas, extras)
+    return {
+        "id": atividade_id,
+        "origem": "gerada",
+        "url": url,
+        "resultado": execucao.resultados["final"],
+        "extras": {nome: execucao.resultados[nome] for nome in extras},
+        "etapas": {nome: execucao.resultados[nome] for nome in execucao.tempos},
+        "tempos": execucao.tempos,
+        "caminho_critico": execucao.caminho_critico,
+    }
+
+
+# ==============================================================================
+# APLICAÇÃO ASGI
+# ==============================================================================
+async def ler_corpo(receive):
+    """Lê o corpo da requisição. Devolve None se o cliente desconectar antes."""
+    corpo = b""
+    while True:
+        mensagem = await receive()
+        if mensagem["type"] == "http.disconnect":
+            return None
+        corpo += mensagem.get("body", b"")
+        if not mensagem.get("more_body"):
+            return corpo
+
+
+async def responder_json(send, status: int, dados: dict) -> None:
+    corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json; charset=utf-8")]})
+    await send({"type": "http.response.body", "body": corpo})
+
+
+async def esperar_desconexao(receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def orquestrar_agentes_async(receive, send) -> None:
+    corpo = await ler_corpo(receive)
+    if corpo is None:
+        return
+    try:
+        data = json.loads(corpo or b"{}")
+    except ValueError:
+        return await responder_json(send, 400, {"erro": "JSON inválido"})
+    if data.get('modo', 'manual') != 'aleatorio' and not data.get('url'):
+        return await responder_json(send, 400, {"erro": "URL não fornecida"})
+    extras, erro = validar_extras(data)
+    if erro:
+        return await responder_json(send, 400, erro)
+
+    eventos = asyncio.Queue()
+
+    async def produzir():
+        try:
+            reservada = None
+            if data.get('modo', 'manual') == 'aleatorio' and not data.get('regenerar'):
+                reservada = atividade_da_reserva(extras)
+            if reservada is not None:
+                eventos.put_nowait({"etapa": "url", "resultado": reservada["url"]})
+                for evento in eventos_atividade_pronta(reservada):
+                    eventos.put_nowait(evento)
+                return
+            url = normalizar_url(await resolver_url_inicial_async(data))
+            if not url:
+                raise ValueError("O explorador não conseguiu escolher uma URL.")
+            eventos.put_nowait({"etapa": "url", "resultado": url})
+            resultado = await gerar_atividade_async(
+                url, data.get('modo', 'manual'), extras=extras, regenerar=bool(data.get('regenerar', False)),
+                ao_concluir=lambda nome, texto: eventos.put_nowait({"etapa": nome, "resultado": texto}),
+            )
+            if resultado["origem"] == "acervo":
+                # Vindo do acervo, as etapas não passaram pelo ao_concluir: são enviadas agora, na ordem.
+                for evento in eventos_atividade_pronta(resultado, extras):
+                    eventos.put_nowait(evento)
+            else:
+                eventos.put_nowait({"fim": True, "id": resultado["id"], "origem": resultado["origem"],
+                                    "tempos": resultado["tempos"], "caminho_critico": resultado["caminho_critico"]})
+        except Exception as e:
+            print(f"❌ Erro fatal durante a orquestração: {e}")
+            eventos.put_nowait({"erro": str(e)})
+        finally:
+            eventos.put_nowait(None)
+
+    await send({"type": "http.response.start", "status": 200, "headers": [
+        (b"content-type", b"application/x-ndjson"), (b"cache-control", b"no-cache"), (b"x-accel-buffering", b"no"),
+    ]})
+    geracao = asyncio.ensure_future(produzir())
+    desconexao = asyncio.ensure_future(esperar_desconexao(receive))
+    try:
+        while True:
+            proximo = asyncio.ensure_future(eventos.get())
+            await asyncio.wait({proximo, desconexao}, return_when=asyncio.FIRST_COMPLETED)
+            if not proximo.done():
+                proximo.cancel()
+                print("🔌 Cliente desconectou: geração cancelada.")
+                return
+            evento = proximo.result()
+            if evento is None:
+                break
+            await send({"type": "http.response.body", "body": evento_ndjson(evento).encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        # Desconexão (ou erro ao enviar): as chamadas ao modelo em andamento são canceladas.
+        geracao.cancel()
+        desconexao.cancel()
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            mensagem = await receive()
+            if mensagem["type"] == "lifespan.startup":
+                RESERVA_ALEATORIA.iniciar()
+                await send({"type": "lifespan.startup.complete"})
+            elif mensagem["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+    if scope["method"] == "POST" and scope["path"] == "/gerar-atividade/async":
+        return await orquestrar_agentes_async(receive, send)
+    await responder_json(send, 404, {"erro": "Rota não encontrada. As demais rotas são servidas pelo app Flask (app.py)."})
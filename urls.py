@@ -0,0 +1,19 @@
+# ==============================================================================
+# UTILITÁRIOS DE URL
+# ==============================================================================
+from urllib.parse import urlsplit, urlunsplit
+
+
+def normalizar_url(url: str) -> str:
+    """
+    Normaliza a URL para que variações do mesmo endereço sejam tratadas como iguais.
+    Ex: " Airbnb.com/ " e "https://airbnb.com" viram "https://airbnb.com".
+    """
+    url = (url or "").strip()
+    if not url:
+        return url
+    if "://" not in url:
+        url = f"https://{url}"
+    partes = urlsplit(url)
+    caminho = partes.path.rstrip("/")
+    return urlunsplit((partes.scheme.lower(), partes.netloc.lower(), caminho, partes.query, ""))